@@ -1,22 +1,30 @@
-import fs from "fs"
-import path from "path"
 import { NextResponse } from "next/server"
 
-export async function GET() {
-  try {
-    const filePath = path.join(process.cwd(), "data", "prices.csv")
+const API_URL = process.env.NEXT_PUBLIC_API_URL || "https://amazon-scraper-api.up.railway.app/"
 
-    if (!fs.existsSync(filePath)) {
-      return NextResponse.json({ success: false, error: "No prices.csv found yet." }, { status: 404 })
-    }
+// GET /api/get-prices?asin=...&fields=...&limit=...&cursor=...
+// Proxies one page of the backend's GET /prices (keyset-paginated DB query)
+// instead of reading the whole prices.csv; ETag/If-None-Match pass through.
+export async function GET(req) {
+  try {
+    const { search } = new URL(req.url)
+    const headers = {}
+    const ifNoneMatch = req.headers.get("if-none-match")
+    if (ifNoneMatch) headers["If-None-Match"] = ifNoneMatch
 
-    const csv = fs.readFileSync(filePath, "utf-8")
-    const lines = csv.trim().split("\n")
-    const headers = lines[0].split(",")
-    const rows = lines.slice(1).map((line) => line.split(","))
+    const res = await fetch(`${API_URL.replace(/\/$/, "")}/prices${search}`, { headers, cache: "no-store" })
+    const etag = res.headers.get("etag")
+    const passHeaders = etag ? { ETag: etag, "Cache-Control": "no-cache" } : {}
 
-    return NextResponse.json({ success: true, headers, rows })
+    if (res.status === 304) {
+      return new NextResponse(null, { status: 304, headers: passHeaders })
+    }
+    const body = await res.json()
+    if (!res.ok) {
+      return NextResponse.json({ success: false, error: body.detail ?? res.statusText }, { status: res.status })
+    }
+    return NextResponse.json({ success: true, ...body }, { headers: passHeaders })
   } catch (err) {
-    return NextResponse.json({ success: false, error: err.message })
+    return NextResponse.json({ success: false, error: err.message }, { status: 502 })
   }
 }
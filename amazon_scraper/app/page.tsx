@@ -11,7 +11,7 @@ import { CsvMode } from "@/components/csv-mode";
 import { SearchMode } from "@/components/search-mode";
 import { PriceHistory } from "@/components/price-history";
 import { NavBar } from "@/components/nav-bar";
-import { getProducts } from "@/lib/api";
+import { getProducts, runScraper, watchJob } from "@/lib/api";
 
 type Mode = "csv" | "search";
 
@@ -87,18 +87,18 @@ export default function Page() {
     setLoading(true);
 
     try {
-      const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/run-scraper`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ keyword: term, headless, max_items: 1 }),
+      const job = await runScraper(term, 1);
+      const data = await watchJob(job.job_id, (j) => {
+        const p = j.progress;
+        setLogs((prev) => [
+          ...prev,
+          `[${new Date().toLocaleTimeString()}] Page ${p.pages_done}/${p.pages_total}, ${p.items_found} items (${p.items_per_second}/s)`,
+        ]);
       });
-      if (!res.ok) throw new Error("FastAPI server error.");
-
-      const data = await res.json();
       setMessage(`Search scrape finished for "${term}".`);
       setLogs((prev) => [
         ...prev,
-        `[${new Date().toLocaleTimeString()}] ${data.message || "Search scrape finished."}`,
+        `[${new Date().toLocaleTimeString()}] ${data.result?.message || "Search scrape finished."}`,
       ]);
 
       const p = await getProducts();
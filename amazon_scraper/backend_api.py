@@ -6,7 +6,7 @@ import os
 import pathlib
 
 # Import your existing functions/constants from scraper.py (unchanged)
-from scraper import start_driver, scrape_from_search, scrape_from_search_pages, PRICES_FILE
+from scraper import driver_pool, scrape_from_search, scrape_from_search_pages, PRICES_FILE
 
 app = FastAPI()
 
@@ -26,14 +26,12 @@ def home():
 # Keep your original scrape GET route unchanged (calls existing function that expects driver)
 @app.get("/scrape")
 def scrape(keyword: str = Query("wireless earbuds", description="Search keyword")):
-    driver = start_driver(headless=True)
     try:
-        scrape_from_search(driver, keyword)
+        with driver_pool.borrow() as driver:
+            scrape_from_search(driver, keyword)
         return {"message": f"Scraping complete for '{keyword}'"}
     except Exception as e:
         return {"error": str(e)}
-    finally:
-        driver.quit()
 
 # NEW/UPDATED: POST /run-scraper
 # Accepts JSON body: { "keyword": "term", "pages": 3 }
@@ -1,31 +1,53 @@
 "use client"
 
+import { useEffect, useState } from "react"
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card"
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table"
 import { LineChart, Line, CartesianGrid, XAxis, YAxis, Tooltip, ResponsiveContainer } from "recharts"
+import { getPrices } from "@/lib/api"
 
-const data = [
-  { date: "09/01", price: 29.99 },
-  { date: "09/05", price: 27.49 },
-  { date: "09/10", price: 25.99 },
-  { date: "09/15", price: 26.49 },
-  { date: "09/20", price: 24.99 },
-  { date: "09/25", price: 23.49 },
-  { date: "09/30", price: 22.99 },
-]
+const RECENT_ROWS = 10
+const TREND_POINTS = 60
 
-const recent = [
-  { asin: "B0DXYZ123", date: "09/30", price: "$22.99" },
-  { asin: "B09ABC456", date: "09/29", price: "$18.49" },
-  { asin: "B08JKL789", date: "09/28", price: "$15.25" },
-]
+type Observation = { asin: string; price: number | null; currency?: string; scraped_at: string }
+
+const shortDate = (iso: string) => new Date(iso).toLocaleDateString(undefined, { month: "2-digit", day: "2-digit" })
+const money = (price: number | null, currency = "USD") =>
+  price == null ? "N/A" : new Intl.NumberFormat(undefined, { style: "currency", currency }).format(price)
 
 export function PriceHistory() {
+  const [recent, setRecent] = useState<Observation[]>([])
+  const [trend, setTrend] = useState<{ date: string; price: number | null }[]>([])
+  const [error, setError] = useState<string | null>(null)
+
+  useEffect(() => {
+    // Only what is on screen: the latest rows, then one ASIN's history for the chart
+    async function load() {
+      try {
+        const { items } = await getPrices({ fields: "asin,price,currency,scraped_at", limit: RECENT_ROWS })
+        setRecent(items)
+        if (!items.length) return
+        const history = await getPrices({ asin: items[0].asin, fields: "price,scraped_at", limit: TREND_POINTS })
+        setTrend(
+          history.items
+            .slice()
+            .reverse()
+            .map((o: Observation) => ({ date: shortDate(o.scraped_at), price: o.price })),
+        )
+      } catch (err: any) {
+        setError(err.message)
+      }
+    }
+    load()
+  }, [])
+
   return (
     <Card>
       <CardHeader>
         <CardTitle className="text-pretty">Price History</CardTitle>
-        <CardDescription>Recent prices and overall trend (placeholder).</CardDescription>
+        <CardDescription>
+          {error ? `Could not load prices: ${error}` : "Latest scraped prices and the trend of the most recent ASIN."}
+        </CardDescription>
       </CardHeader>
       <CardContent className="grid gap-6 md:grid-cols-2">
         <div className="rounded-lg border">
@@ -39,10 +61,10 @@ export function PriceHistory() {
             </TableHeader>
             <TableBody>
               {recent.map((r) => (
-                <TableRow key={`${r.asin}-${r.date}`}>
+                <TableRow key={`${r.asin}-${r.scraped_at}`}>
                   <TableCell className="font-mono text-xs">{r.asin}</TableCell>
-                  <TableCell>{r.date}</TableCell>
-                  <TableCell className="font-medium">{r.price}</TableCell>
+                  <TableCell>{shortDate(r.scraped_at)}</TableCell>
+                  <TableCell className="font-medium">{money(r.price, r.currency)}</TableCell>
                 </TableRow>
               ))}
             </TableBody>
@@ -50,10 +72,12 @@ export function PriceHistory() {
         </div>
 
         <div className="rounded-lg border p-3">
-          <div className="mb-2 text-xs font-medium text-muted-foreground">Price trend (placeholder)</div>
+          <div className="mb-2 text-xs font-medium text-muted-foreground">
+            Price trend{recent[0] ? ` (${recent[0].asin})` : ""}
+          </div>
           <div className="h-56 w-full">
             <ResponsiveContainer width="100%" height="100%">
-              <LineChart data={data} margin={{ top: 8, right: 16, left: 8, bottom: 8 }}>
+              <LineChart data={trend} margin={{ top: 8, right: 16, left: 8, bottom: 8 }}>
                 <CartesianGrid strokeDasharray="3 3" />
                 <XAxis dataKey="date" tick={{ fontSize: 12 }} />
                 <YAxis tick={{ fontSize: 12 }} />
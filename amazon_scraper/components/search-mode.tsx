@@ -5,6 +5,7 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/com
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { Button } from "@/components/ui/button";
+import { runScraper, watchJob } from "@/lib/api";
 
 interface SearchModeProps {
   keyword: string;
@@ -21,15 +22,17 @@ export function SearchMode({ keyword, setKeyword, logs, setLogs }: SearchModePro
     setLogs(["Starting scraper..."]);
 
     try {
-      const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/run-scraper`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ keyword, headless: true, max_items: 20 }),
-      });
-      if (!res.ok) throw new Error("Scraper failed");
+      const job = await runScraper(keyword, 1);
+      setLogs((prev) => [...prev, job.message]);
 
-      const data = await res.json();
-      setLogs((prev) => [...prev, data.message]);
+      const done = await watchJob(job.job_id, (j) => {
+        const p = j.progress;
+        setLogs((prev) => [
+          ...prev,
+          `Pages ${p.pages_done}/${p.pages_total} · ${p.items_found} items · ${p.items_per_second} items/s`,
+        ]);
+      });
+      setLogs((prev) => [...prev, done.result?.message ?? "Scrape finished."]);
     } catch (err: any) {
       setLogs((prev) => [...prev, `Error: ${err.message}`]);
     } finally {
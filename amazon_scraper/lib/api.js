@@ -3,14 +3,20 @@ const BASE_URL =
 
 // ------------------------------
 // Run Search Mode Scraper
+// Returns the queued job: { job_id, status_url, events_url, ... }
+// workers > 1 fetches that many result pages in parallel
 // ------------------------------
-export async function runScraper(keyword, pages = 1) {
+export async function runScraper(keyword, pages = 1, workers = 1) {
   const res = await fetch(`${BASE_URL}/run-scraper`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ keyword, pages }),
+    body: JSON.stringify({ keyword, pages, workers }),
   });
 
+  if (res.status === 429) {
+    const retryAfter = res.headers.get("Retry-After") || "a few";
+    throw new Error(`Scraper is busy, try again in ${retryAfter} seconds`);
+  }
   if (!res.ok) {
     const errorText = await res.text();
     throw new Error(`Search scrape failed: ${errorText}`);
@@ -19,6 +25,29 @@ export async function runScraper(keyword, pages = 1) {
   return res.json();
 }
 
+// ------------------------------
+// Follow a scrape job over Server-Sent Events
+// onProgress(job) fires on every update; resolves with the finished job
+// ------------------------------
+export function watchJob(jobId, onProgress = () => {}) {
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${BASE_URL}/jobs/${jobId}/events`);
+
+    source.addEventListener("progress", (e) => onProgress(JSON.parse(e.data)));
+    source.addEventListener("end", (e) => {
+      const job = JSON.parse(e.data);
+      source.close();
+      onProgress(job);
+      if (job.status === "failed") reject(new Error(job.error || "Scrape failed"));
+      else resolve(job);
+    });
+    source.onerror = () => {
+      source.close();
+      reject(new Error("Lost connection to job progress stream"));
+    };
+  });
+}
+
 // ------------------------------
 // Run CSV Mode Scraper
 // ------------------------------
@@ -86,3 +115,21 @@ export async function getProducts() {
   if (!res.ok) throw new Error("Failed to fetch products");
   return res.json();
 }
+
+// ------------------------------
+// Price history, one page at a time
+// params: { asin, status, min_price, max_price, start, end, fields, limit, cursor }
+// Resolves with { items, next_cursor }; pass next_cursor back for the next page
+// ------------------------------
+export async function getPrices(params = {}) {
+  const query = new URLSearchParams(
+    Object.entries(params).filter(([, v]) => v !== undefined && v !== null && v !== "")
+  );
+  // The browser revalidates with If-None-Match; unchanged pages come back as 304
+  const res = await fetch(`${BASE_URL}/prices?${query}`, { cache: "no-cache" });
+  if (!res.ok) {
+    const errorText = await res.text();
+    throw new Error(`Failed to fetch prices: ${errorText}`);
+  }
+  return res.json();
+}
@@ -1,8 +1,6 @@
 import os
 import csv
-import time
-import random
-from datetime import datetime, timezone
+import atexit
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
@@ -16,17 +14,31 @@ from webdriver_manager.chrome import ChromeDriverManager
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 PRODUCTS_FILE = os.path.join(DATA_DIR, "products.csv")
-PRICES_FILE = os.path.join(DATA_DIR, "prices.csv")
 
 HEADLESS = True
 WAIT_TIME = 10
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))
+DRIVER_MAX_PAGES = int(os.getenv("DRIVER_MAX_PAGES", "50"))
 
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Shared with the root API; installed from the repo root (see requirements.txt)
+from extractors import (
+    LEGACY_PRICE_XPATHS,
+    SEARCH_TITLE_XPATHS,
+    extract_price as extract_price_from_node,
+    extract_price_from_html,
+    parse_search_cards,
+)
+from driver_pool import DriverPool
+from rate_scheduler import scheduler
+from driver_profiles import DRIVER_PROFILE, apply_profile, enable_request_blocking, wait_for_content
+from sinks import PRICES_FILE, PRICE_SINK, build_sink, price_row
+
 # ----------------------
 # Setup Chrome Driver
 # ----------------------
-def start_driver(headless=True):
+def start_driver(headless=True, profile=DRIVER_PROFILE):
     chrome_options = webdriver.ChromeOptions()
     if headless:
         chrome_options.add_argument("--headless=new")
@@ -44,55 +56,73 @@ def start_driver(headless=True):
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/120.0.0.0 Safari/537.36"
     )
+    apply_profile(chrome_options, profile)
 
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=chrome_options)
+    enable_request_blocking(driver, profile)
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     return driver
 
+
+# Shared pool used by the CLI, backend_api.py and streamlit_app.py
+driver_pool = DriverPool(
+    lambda: start_driver(headless=HEADLESS),
+    size=DRIVER_POOL_SIZE,
+    max_pages=DRIVER_MAX_PAGES,
+)
+atexit.register(driver_pool.close)
+
 # ----------------------
-# Save Prices CSV
-# (unchanged)
+# Save Prices
 # ----------------------
+# Buffered output (sinks.py): CSV and/or partitioned Parquet, written in batches
+price_sink = build_sink(PRICE_SINK)
+
+
 def save_price(sku, title, price, currency, status, url):
-    file_exists = os.path.exists(PRICES_FILE)
-    with open(PRICES_FILE, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(["date", "sku", "title", "price", "currency", "status", "url"])
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        writer.writerow([today, sku, title, price, currency, status, url])
+    price_sink.write(price_row(sku, title, price, currency, status, url))
     print(f"[OK] Saved: {sku} | {title[:50]} | {price} {currency} | {status}")
 
 # ----------------------
-# Extract price with multiple fallbacks
-# (unchanged)
+# Extract price with multiple fallbacks (shared lxml extractors)
 # ----------------------
 def extract_price(item):
-    selectors = [
-        "span.a-price span.a-offscreen",
-        "span.a-price .a-offscreen",
-        "span.a-color-base.a-text-bold",
-        "span.a-price-whole",
-        "span.a-text-price span.a-offscreen",
-    ]
-    for selector in selectors:
-        try:
-            elem = item.find_element(By.CSS_SELECTOR, selector)
-            price_text = elem.get_attribute("innerText").replace("$", "").replace(",", "").strip()
-            if price_text:
-                return float(price_text)
-        except:
-            continue
-    return None
+    """
+    Accepts a WebElement (card) or the driver itself. Fetches the HTML in a
+    single round-trip and runs every selector in-process.
+    """
+    try:
+        if hasattr(item, "page_source"):
+            html = item.page_source
+        else:
+            html = item.get_attribute("outerHTML")
+    except Exception:
+        return None
+    return extract_price_from_html(html, LEGACY_PRICE_XPATHS)
+
+
+def parse_card(card):
+    """(asin, title, price) for a parsed search card (see extractors.parse_search_cards)."""
+    asin = card.get("data-asin")
+    if not asin:
+        return None
+    title = "Unknown"
+    for el in SEARCH_TITLE_XPATHS[0](card):
+        txt = el.text_content().strip()
+        if txt:
+            title = txt
+            break
+    price = extract_price_from_node(card, LEGACY_PRICE_XPATHS)
+    return asin, title, price
 
 # ----------------------
 # Scrape product page
-# (unchanged)
 # ----------------------
 def scrape_product(driver, url, sku):
+    scheduler.acquire(url)
     driver.get(url)
-    time.sleep(random.uniform(2, 4))
+    driver_pool.record_page(driver)
 
     try:
         title_elem = WebDriverWait(driver, WAIT_TIME).until(
@@ -110,7 +140,6 @@ def scrape_product(driver, url, sku):
 
 # ----------------------
 # CSV Mode
-# (unchanged)
 # ----------------------
 def scrape_from_csv(driver, max_items=None):
     if not os.path.exists(PRODUCTS_FILE):
@@ -127,44 +156,42 @@ def scrape_from_csv(driver, max_items=None):
         url = product.get("url") or f"https://www.amazon.com/dp/{product['sku']}"
         sku = product["sku"]
         scrape_product(driver, url, sku)
-        time.sleep(random.uniform(2, 5))
+    price_sink.flush()
 
 # ----------------------
-# Search Mode (original function — unchanged)
+# Search Mode (first results page)
 # ----------------------
 def scrape_from_search(driver, keyword):
     base_url = f"https://www.amazon.com/s?k={keyword.replace(' ', '+')}"
     print(f"Searching Amazon for: {base_url}")  
 
+    scheduler.acquire(base_url)
     driver.get(base_url)
-    time.sleep(random.uniform(3, 5))
+    driver_pool.record_page(driver)
+    wait_for_content(driver, "search", WAIT_TIME)
 
-    items = driver.find_elements(By.CSS_SELECTOR, "div.s-main-slot div[data-asin][data-component-type='s-search-result']")
+    items = parse_search_cards(driver.page_source)
     print(f"Found {len(items)} items")
 
     if not items:
         print("No items found — Amazon might be blocking or layout changed.")
 
     for item in items:
-        asin = item.get_attribute("data-asin")
-        if not asin:
+        parsed = parse_card(item)
+        if not parsed:
             continue
 
-        try:
-            title = item.find_element(By.CSS_SELECTOR, "h2 a span").text.strip()
-        except:
-            title = "Unknown"
-
-        price = extract_price(item)
+        asin, title, price = parsed
         status = "ok" if price else "no_price"
 
         url = f"https://www.amazon.com/dp/{asin}"
         save_price(asin, title, price or "", "USD", status, url)
 
+    price_sink.flush()
     print(f"Results saved to: {os.path.abspath(PRICES_FILE)}")
 
 # ----------------------
-# New helper: scrape multiple pages (safe append — new)
+# Search Mode, multiple pages (used by backend_api.py)
 # ----------------------
 def scrape_from_search_pages(keyword, pages=1):
     """
@@ -173,15 +200,14 @@ def scrape_from_search_pages(keyword, pages=1):
     - Tries direct URL with &page=N and if items are empty, tries clicking pagination button.
     - Returns the basename of PRICES_FILE (so backend can return csv_file to frontend).
     """
-    # Remove old prices file to ensure fresh output
-    if os.path.exists(PRICES_FILE):
-        try:
-            os.remove(PRICES_FILE)
-            print(f"[scrape_from_search_pages] Removed previous {PRICES_FILE}")
-        except Exception as e:
-            print(f"[scrape_from_search_pages] Warning: could not remove old file: {e}")
-
-    driver = start_driver(headless=HEADLESS)
+    # Remove old prices output to ensure fresh output
+    try:
+        price_sink.reset()
+        print(f"[scrape_from_search_pages] Cleared previous output ({PRICE_SINK})")
+    except Exception as e:
+        print(f"[scrape_from_search_pages] Warning: could not remove old file: {e}")
+
+    driver = driver_pool.checkout()
     try:
         base = f"https://www.amazon.com/s?k={keyword.replace(' ', '+')}"
         print(f"[scrape_from_search_pages] Starting multi-page scrape for '{keyword}' ({pages} pages)")
@@ -189,10 +215,12 @@ def scrape_from_search_pages(keyword, pages=1):
         for page in range(1, pages + 1):
             url = f"{base}&page={page}"
             print(f"[scrape_from_search_pages] Visiting page {page}: {url}")
+            scheduler.acquire(url)
             driver.get(url)
-            time.sleep(random.uniform(2.5, 5.0))
+            driver_pool.record_page(driver)
+            wait_for_content(driver, "search", WAIT_TIME)
 
-            items = driver.find_elements(By.CSS_SELECTOR, "div.s-main-slot div[data-asin][data-component-type='s-search-result']")
+            items = parse_search_cards(driver.page_source)
             print(f"[scrape_from_search_pages] Found {len(items)} items on page {page}")
 
             # Fallback: if no items found via direct URL, try clicking pagination button
@@ -205,14 +233,15 @@ def scrape_from_search_pages(keyword, pages=1):
                         text = (b.text or "").strip()
                         if text == str(page):
                             try:
+                                scheduler.acquire(url)
                                 b.click()
                                 clicked = True
-                                time.sleep(random.uniform(2, 4))
+                                wait_for_content(driver, "search", WAIT_TIME)
                                 break
                             except Exception:
                                 continue
                     if clicked:
-                        items = driver.find_elements(By.CSS_SELECTOR, "div.s-main-slot div[data-asin][data-component-type='s-search-result']")
+                        items = parse_search_cards(driver.page_source)
                         print(f"[scrape_from_search_pages] After click, found {len(items)} items on page {page}")
                 except Exception as e:
                     print(f"[scrape_from_search_pages] Pagination fallback failed: {e}")
@@ -223,14 +252,10 @@ def scrape_from_search_pages(keyword, pages=1):
 
             for item in items:
                 try:
-                    asin = item.get_attribute("data-asin")
-                    if not asin:
+                    parsed = parse_card(item)
+                    if not parsed:
                         continue
-                    try:
-                        title = item.find_element(By.CSS_SELECTOR, "h2 a span").text.strip()
-                    except:
-                        title = "Unknown"
-                    price = extract_price(item)
+                    asin, title, price = parsed
                     status = "ok" if price else "no_price"
                     url = f"https://www.amazon.com/dp/{asin}"
                     save_price(asin, title, price or "", "USD", status, url)
@@ -238,17 +263,15 @@ def scrape_from_search_pages(keyword, pages=1):
                     print(f"[scrape_from_search_pages] Error processing item: {e}")
                     continue
 
-            # short random delay between pages
-            time.sleep(random.uniform(1.5, 3.0))
-
     finally:
-        driver.quit()
+        driver_pool.checkin(driver)
+        price_sink.flush()
 
     print(f"[scrape_from_search_pages] Finished. Results saved to: {os.path.abspath(PRICES_FILE)}")
     return os.path.basename(PRICES_FILE)
 
 # ----------------------
-# Main CLI (unchanged)
+# Main CLI
 # ----------------------
 if __name__ == "__main__":
     import argparse
@@ -260,15 +283,13 @@ if __name__ == "__main__":
     parser.add_argument("--headless", action="store_true")
     args = parser.parse_args()
 
-    driver = start_driver(headless=args.headless)
+    HEADLESS = args.headless
 
-    try:
+    with driver_pool.borrow() as driver:
         if args.mode == "csv":
             scrape_from_csv(driver, max_items=args.max_items or None)
         else:
             scrape_from_search(driver, args.keyword)
-    finally:
-        driver.quit()
 
     print(f"Results saved in: {os.path.abspath(PRICES_FILE)}")
     print("Scraping finished successfully!")
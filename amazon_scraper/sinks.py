@@ -0,0 +1,257 @@
+import os
+import csv
+import glob
+import time
+import atexit
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timezone
+
+# ----------------------
+# Config
+# ----------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+PRICES_FILE = os.path.join(DATA_DIR, "prices.csv")
+PRICES_PARQUET_DIR = os.path.join(DATA_DIR, "prices_parquet")
+
+# Where save_price() writes: "csv", "parquet" or both ("csv,parquet")
+PRICE_SINK = os.getenv("PRICE_SINK", "csv")
+SINK_BATCH_SIZE = int(os.getenv("SINK_BATCH_SIZE", "200"))          # rows per write
+SINK_FLUSH_INTERVAL = float(os.getenv("SINK_FLUSH_INTERVAL", "5.0"))  # seconds before a partial batch is written
+
+PRICE_COLUMNS = ["date", "sku", "title", "price", "currency", "status", "url"]
+
+
+def price_row(sku, title, price, currency, status, url, day=None):
+    """One prices row; `price` becomes a float (None when missing)."""
+    if price in ("", None):
+        price = None
+    else:
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            price = None
+    day = day or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return {"date": day, "sku": sku, "title": title, "price": price,
+            "currency": currency, "status": status, "url": url}
+
+
+# ----------------------
+# Sinks
+# ----------------------
+class PriceSink(ABC):
+    """
+    Buffers price rows and hands them to _write_rows() in batches of
+    `batch_size` (or after `flush_interval` seconds), instead of opening
+    the output once per row. Call flush() at the end of a run.
+    Writers keep buffering while a batch is being written.
+    """
+
+    def __init__(self, batch_size=SINK_BATCH_SIZE, flush_interval=SINK_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()        # guards the buffer
+        self._io_lock = threading.Lock()     # one batch written at a time, in order
+        self._last_flush = time.monotonic()
+
+    def write(self, row):
+        with self._lock:
+            self._buffer.append(row)
+            due = (len(self._buffer) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+                self._last_flush = time.monotonic()
+            if rows:
+                self._write_rows(rows)
+        return len(rows)
+
+    def reset(self):
+        """Drop buffered rows and delete the output (a fresh run)."""
+        with self._io_lock:
+            with self._lock:
+                self._buffer = []
+            self._remove()
+
+    @abstractmethod
+    def _write_rows(self, rows):
+        """Append one batch of price_row() dicts to the output."""
+
+    @abstractmethod
+    def _remove(self):
+        """Delete the output."""
+
+
+class CsvSink(PriceSink):
+    """Appends batches to one CSV file (data/prices.csv), header written once."""
+
+    def __init__(self, path=PRICES_FILE, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+
+    def _write_rows(self, rows):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=PRICE_COLUMNS)
+            if f.tell() == 0:
+                writer.writeheader()
+            writer.writerows({**r, "price": "" if r["price"] is None else r["price"]} for r in rows)
+
+    def _remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ParquetSink(PriceSink):
+    """
+    Typed, columnar copy of the prices: each flush writes one Parquet file
+    per day into a hive-partitioned directory
+
+        data/prices_parquet/date=2025-10-20/part-<timestamp>-<n>.parquet
+
+    so readers can skip whole days and read only the columns they need.
+    """
+
+    def __init__(self, root=PRICES_PARQUET_DIR, **kwargs):
+        import pyarrow  # noqa: F401  (fail at startup, not on the first flush)
+        super().__init__(**kwargs)
+        self.root = root
+        self._parts = 0
+
+    @staticmethod
+    def schema():
+        import pyarrow as pa
+        return pa.schema([
+            ("sku", pa.string()),
+            ("title", pa.string()),
+            ("price", pa.float64()),
+            ("currency", pa.string()),
+            ("status", pa.string()),
+            ("url", pa.string()),
+        ])
+
+    def _write_rows(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        by_day = {}
+        for r in rows:
+            by_day.setdefault(r["date"], []).append(r)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        for day, day_rows in by_day.items():
+            # The date lives in the directory name, not in the file
+            table = pa.Table.from_pylist(day_rows, schema=self.schema())
+            directory = os.path.join(self.root, f"date={day}")
+            os.makedirs(directory, exist_ok=True)
+            self._parts += 1
+            pq.write_table(table, os.path.join(directory, f"part-{stamp}-{self._parts}.parquet"))
+
+    def _remove(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class MultiSink(PriceSink):
+    """Buffers once and writes every batch to several sinks."""
+
+    def __init__(self, sinks, **kwargs):
+        super().__init__(**kwargs)
+        self.sinks = sinks
+
+    def _write_rows(self, rows):
+        for sink in self.sinks:
+            sink._write_rows(rows)
+
+    def _remove(self):
+        for sink in self.sinks:
+            sink._remove()
+
+
+def build_sink(spec=PRICE_SINK):
+    """Sink for a PRICE_SINK value such as "csv", "parquet" or "csv,parquet"."""
+    kinds = [k.strip() for k in spec.split(",") if k.strip()] or ["csv"]
+    sinks = []
+    for kind in kinds:
+        if kind == "csv":
+            sinks.append(CsvSink())
+        elif kind == "parquet":
+            sinks.append(ParquetSink())
+        else:
+            raise ValueError(f"Unknown PRICE_SINK '{kind}' (expected csv or parquet)")
+    sink = sinks[0] if len(sinks) == 1 else MultiSink(sinks)
+    atexit.register(sink.flush)
+    return sink
+
+
+# ----------------------
+# Readers
+# ----------------------
+def _as_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def prices_mtime():
+    """Latest modification time of the price outputs (0.0 if none) - a cheap cache key."""
+    paths = [PRICES_FILE] + glob.glob(os.path.join(PRICES_PARQUET_DIR, "date=*", "*.parquet"))
+    return max((os.path.getmtime(p) for p in paths if os.path.exists(p)), default=0.0)
+
+
+def read_prices_parquet(columns=None, start=None, end=None, root=PRICES_PARQUET_DIR):
+    """
+    Load prices from the Parquet dataset as a DataFrame. Only the requested
+    `columns` are read, and day partitions outside [start, end] are skipped
+    without being opened.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    columns = list(columns or PRICE_COLUMNS)
+    if not glob.glob(os.path.join(root, "date=*", "*.parquet")):
+        return pa.table({c: [] for c in columns}).to_pandas()
+
+    dataset = ds.dataset(root, format="parquet", partitioning=ds.partitioning(
+        pa.schema([("date", pa.date32())]), flavor="hive",
+    ))
+    condition = None
+    for op, bound in (("ge", _as_date(start)), ("le", _as_date(end))):
+        if bound is None:
+            continue
+        term = ds.field("date") >= bound if op == "ge" else ds.field("date") <= bound
+        condition = term if condition is None else condition & term
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def read_prices_csv(columns=None, start=None, end=None, path=PRICES_FILE):
+    """Load prices.csv as a DataFrame, parsing only the requested `columns`."""
+    import pandas as pd
+
+    columns = list(columns or PRICE_COLUMNS)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=columns)
+    needed = columns if "date" in columns or (start is None and end is None) else columns + ["date"]
+    df = pd.read_csv(path, usecols=needed, dtype={"sku": str, "price": float})
+    if start is not None or end is not None:
+        days = pd.to_datetime(df["date"]).dt.date
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= days >= _as_date(start)
+        if end is not None:
+            keep &= days <= _as_date(end)
+        df = df[keep]
+    return df[columns]
+
+
+def read_prices(columns=None, start=None, end=None):
+    """Prices from the Parquet dataset when it exists, else from prices.csv."""
+    if glob.glob(os.path.join(PRICES_PARQUET_DIR, "date=*", "*.parquet")):
+        return read_prices_parquet(columns, start, end)
+    return read_prices_csv(columns, start, end)
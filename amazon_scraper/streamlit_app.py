@@ -1,7 +1,31 @@
 import streamlit as st
 import pandas as pd
 import os
-from scraper import PRODUCTS_FILE, PRICES_FILE, start_driver, scrape_from_csv, scrape_from_search
+from contextlib import contextmanager
+from datetime import date, timedelta
+from scraper import PRODUCTS_FILE, start_driver, driver_pool, scrape_from_csv, scrape_from_search
+from sinks import read_prices, prices_mtime
+
+
+@contextmanager
+def browser(headless):
+    """Headless runs reuse the shared pool; a visible browser is started on demand."""
+    if headless:
+        with driver_pool.borrow() as driver:
+            yield driver
+        return
+    driver = start_driver(headless=False)
+    try:
+        yield driver
+    finally:
+        driver.quit()
+
+
+@st.cache_data(show_spinner=False)
+def load_prices(since, mtime):
+    """Prices from `since` on; re-read only when the output files change (`mtime` is part of the cache key)."""
+    return read_prices(start=since)
+
 
 st.set_page_config(layout="wide", page_title="Amazon Price Tracker")
 
@@ -12,6 +36,7 @@ st.sidebar.header("Options")
 mode = st.sidebar.radio("Choose Mode", ["CSV Mode", "Search Mode"])
 headless = st.sidebar.checkbox("Headless browser", value=True)
 max_items = st.sidebar.number_input("Max items (CSV mode only, 0 = all)", min_value=0, value=0, step=1)
+since = st.sidebar.date_input("Show prices since", value=date.today() - timedelta(days=30))
 
 # CSV Mode
 if mode == "CSV Mode":
@@ -23,24 +48,23 @@ if mode == "CSV Mode":
         st.warning("No products.csv found.")
 
     if st.button("Run CSV Scraper"):
-        driver = start_driver(headless=headless)
-        scrape_from_csv(driver, max_items=max_items if max_items > 0 else None)
-        driver.quit()
+        with browser(headless) as driver:
+            scrape_from_csv(driver, max_items=max_items if max_items > 0 else None)
         st.success("CSV scraping completed!")
 
 # Search Mode
 if mode == "Search Mode":
     keyword = st.text_input("Enter keyword or ASIN (e.g., wired mouse, B07PGL2ZSL)")
     if st.button("Run Search Scraper"):
-        driver = start_driver(headless=headless)
-        scrape_from_search(driver, keyword)
-        driver.quit()
+        with browser(headless) as driver:
+            scrape_from_search(driver, keyword)
         st.success(f"Scraping for '{keyword}' completed!")
 
 # Show results
 st.subheader("📈 Prices history (data/prices.csv)")
-if os.path.exists(PRICES_FILE):
-    df_prices = pd.read_csv(PRICES_FILE)
+mtime = prices_mtime()
+if mtime:
+    df_prices = load_prices(since, mtime)
     st.dataframe(df_prices.tail(200))
 else:
     st.warning("No prices.csv yet. Run a scraper to create it.")
@@ -0,0 +1,134 @@
+import os
+import time
+import queue
+import logging
+import threading
+import contextvars
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+CSV_CONCURRENCY = int(os.getenv("CSV_CONCURRENCY", os.getenv("DRIVER_POOL_SIZE", "2")))
+
+
+# ----------------------
+# Bounded ASIN executor
+# ----------------------
+def scrape_asins(asins, scrape_fn, concurrency=CSV_CONCURRENCY):
+    """
+    Run scrape_fn(asin) on a bounded thread pool and yield (asin, item, error)
+    as each one finishes, so callers can persist results immediately.
+    `asins` may be any iterable; at most 2 * concurrency are in flight.
+    Each worker borrows its own browser from the driver pool inside scrape_fn;
+    navigations are paced by the fetchers' shared per-host rate scheduler.
+    """
+    concurrency = max(1, int(concurrency))
+
+    source = iter(asins)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="asin-worker") as pool:
+        # Workers inherit the caller's context (trace id) for their log lines
+        def submit(asin):
+            return pool.submit(contextvars.copy_context().run, scrape_fn, asin)
+
+        pending = {submit(a): a for a in islice(source, concurrency * 2)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                asin = pending.pop(fut)
+                try:
+                    yield asin, fut.result(), None
+                except Exception as e:
+                    logger.error(f"[EXECUTOR] {asin} failed: {e}")
+                    yield asin, None, e
+            for asin in islice(source, len(done)):
+                pending[submit(asin)] = asin
+
+
+class _SharedIterator:
+    """Thread-safe view of one iterator, so several workers can pull from it."""
+
+    def __init__(self, iterable):
+        self._source = iter(iterable)
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._lock:
+            return next(self._source)
+
+
+def scrape_asins_pipelined(asins, batch_fn, concurrency=CSV_CONCURRENCY):
+    """
+    scrape_asins for a batch_fn(asin_iterator) that yields (asin, item, error)
+    itself - scraper.scrape_products, which keeps several tabs of one browser
+    loading. `concurrency` workers (one browser each) pull from the same
+    iterator over `asins`, each taking the next ASIN only when a tab is free.
+    If a worker dies, every ASIN it had pulled comes back with its exception
+    as the error, and so does every ASIN no worker got to.
+    """
+    concurrency = max(1, int(concurrency))
+    source = _SharedIterator(asins)
+    results = queue.Queue()
+    finished = object()
+    failures = []
+
+    def work():
+        handed = []  # pulled by this worker, no outcome yet
+
+        def pull():
+            for asin in source:
+                handed.append(asin)
+                yield asin
+
+        try:
+            for outcome in batch_fn(pull()):
+                handed.remove(outcome[0])
+                results.put(outcome)
+        except Exception as e:
+            logger.error(f"[EXECUTOR] Pipelined worker failed with {len(handed)} ASINs in hand: {e}")
+            failures.append(e)
+            for asin in handed:
+                results.put((asin, None, e))
+        finally:
+            results.put(finished)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="asin-worker") as pool:
+        for _ in range(concurrency):
+            pool.submit(contextvars.copy_context().run, work)
+        running = concurrency
+        while running:
+            outcome = results.get()
+            if outcome is finished:
+                running -= 1
+                continue
+            yield outcome
+
+    if failures:
+        # Only left over when every worker died
+        for asin in source:
+            yield asin, None, failures[-1]
+
+
+class ThroughputMeter:
+    """Counts outcomes and reports items/second for the response payload."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.added = self.skipped = self.failed = 0
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        done = self.added + self.failed
+        return {
+            "added": self.added,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 2),
+            "items_per_second": round(done / elapsed, 3) if elapsed > 0 else 0.0,
+        }
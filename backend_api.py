@@ -1,18 +1,40 @@
-from fastapi import FastAPI, HTTPException, File, Form, UploadFile
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-import pandas as pd
 import os
+import json
+import time
+import asyncio
+import logging
 import datetime
-import tempfile
-from io import StringIO
+from typing import Optional
 
 from models import AmazonProduct  # your SQLAlchemy model
-from scraper import scrape_from_search_pages, scrape_product_by_asin  # your existing scraper
-from database import Base  # Base metadata
+from scraper import scrape_from_search_pages, scrape_product_by_asin, scrape_products, tabs_enabled, driver_pool, DRIVER_TABS  # your existing scraper
+from database import Base, sync_url  # Base metadata
+from settings import settings
+from asin_executor import scrape_asins, scrape_asins_pipelined, ThroughputMeter, CSV_CONCURRENCY
+from db_writer import get_writer
+from jobs import job_manager, JobQueueFull, JobCancelled
+from observations import new_run_id
+from result_cache import ResultCache
+from csv_export import export_query, iter_csv, gzip_stream
+from metrics import trace, render as render_metrics, API_REQUEST_SECONDS
+from fetchers import AMAZON_BASE_URL
+from circuit_breaker import breaker, RobotCheckError, CircuitOpenError, BREAKER_MAX_REQUEUES
+from manifest import JobManifest, get_job as get_bulk_job, unfinished_jobs, MANIFEST_CHUNK, MANIFEST_MAX_ATTEMPTS, MANIFEST_RESUME
+from csv_ingest import AsinCsvParser, UploadStream, CsvFormatError
+from work_queue import WorkQueue, WORK_QUEUE, page_payload
+from retention import RetentionEngine, RETENTION_INTERVAL
+from price_query import (fetch_prices, parse_fields, page_etag, InvalidQuery,
+                         DEFAULT_FIELDS, PRICES_PAGE_SIZE, PRICES_MAX_PAGE_SIZE)
+
+logger = logging.getLogger(__name__)
 
 # =========================
 # Database setup
@@ -22,15 +44,24 @@ DATABASE_URL = settings.DATABASE_URL
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+# The API talks to the DB synchronously; accept the async URLs used by database.py too
+SYNC_DATABASE_URL = sync_url(DATABASE_URL)
+
 engine = create_engine(
-    DATABASE_URL,
+    SYNC_DATABASE_URL,
     pool_pre_ping=True,
-    connect_args={"sslmode": "require"},
+    connect_args={"sslmode": "require"} if SYNC_DATABASE_URL.startswith("postgresql") else {},
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Freshness-aware ASIN cache (in-process LRU in front of price_observations)
+result_cache = ResultCache(SessionLocal)
+
+# With WORK_QUEUE=1 pages and ASINs go to the shared queue and worker nodes scrape them
+work_queue = WorkQueue() if WORK_QUEUE else None
+
 # =========================
 # FastAPI setup
 # =========================
@@ -42,204 +73,692 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Trace-Id"],
 )
 
 
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """Request latency histogram + a trace id (X-Request-ID or a new one) for the request's logs."""
+    with trace(request.headers.get("X-Request-ID")) as trace_id:
+        start = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        API_REQUEST_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), str(response.status_code)
+        ).observe(time.perf_counter() - start)
+        response.headers["X-Trace-Id"] = trace_id
+        return response
+
+
 # =========================
 # Models
 # =========================
 class ScraperRequest(BaseModel):
     keyword: str
     pages: int = 1
+    max_age: Optional[int] = None  # seconds; ASINs scraped more recently are not re-written
+    workers: int = 1               # search pages fetched in parallel (capped at DRIVER_POOL_SIZE, or DRIVER_TABS)
 
 
 # =========================
 # Root
 # =========================
+# Health and read endpoints are `async def` on purpose: they answer straight
+# from the event loop, never waiting for a threadpool slot while scrapes run.
 @app.get("/")
-def root():
+async def root():
     return {"message": "Amazon Scraper API is live."}
 
 
 # =========================
-# Auto-cleanup old data (24h)
+# Metrics (Prometheus)
 # =========================
-def auto_cleanup_old_data():
-    db = SessionLocal()
-    try:
-        cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=24)
-        deleted = db.query(AmazonProduct).filter(AmazonProduct.created_at < cutoff).delete()
-        db.commit()
-        if deleted:
-            print(f"Cleaned {deleted} old records (>24h).")
-    except Exception as e:
-        print(f"Cleanup failed: {e}")
-    finally:
-        db.close()
+@app.get("/metrics")
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+# =========================
+# Retention (RETENTION_POLICIES)
+# =========================
+# Batched deletes of expired rows on a background thread, every RETENTION_INTERVAL seconds
+retention = RetentionEngine(engine)
 
 
-auto_cleanup_old_data()
+@app.on_event("startup")
+def start_retention():
+    if retention.start(RETENTION_INTERVAL):
+        logger.info(f"[RETENTION] Every {RETENTION_INTERVAL:.0f}s: "
+                    + ", ".join(f"{p.name} > {p.max_age}" for p in retention.policies))
+
+
+@app.on_event("shutdown")
+def stop_retention():
+    retention.stop()
+
+
+@app.get("/retention")
+async def retention_status():
+    """Policies and the report of the last retention pass (rows deleted, batches, seconds per table)."""
+    return {
+        "interval_seconds": RETENTION_INTERVAL,
+        "policies": {p.name: p.max_age.total_seconds() for p in retention.policies},
+        "last_run": retention.last_report,
+    }
 
 
 # =========================
-# Search Scraper
+# Search Scraper (background job)
 # =========================
-@app.post("/run-scraper")
-def run_scraper(request: ScraperRequest):
+def requeue_search(keyword, pending_pages, retry_after, max_age, attempt, workers=1):
+    """Schedule the pages a blocked run could not finish as a follow-up job; returns its id."""
+    if not pending_pages:
+        return None
+    if attempt >= BREAKER_MAX_REQUEUES:
+        logger.warning(f"[JOB] Giving up on pages {pending_pages} for '{keyword}' after {attempt} requeues")
+        return None
+    job = job_manager.submit(
+        "search",
+        search_job(keyword, len(pending_pages), max_age, pending_pages, attempt + 1, workers),
+        {"keyword": keyword, "pages": pending_pages, "max_age": max_age, "attempt": attempt + 1, "workers": workers},
+        pages_total=len(pending_pages),
+        delay=retry_after,
+        force=True,
+    )
+    return job.id
+
+
+def search_job(keyword, pages, max_age=None, page_numbers=None, attempt=0, workers=1):
+    """
+    Job body for /run-scraper: scrape, then bulk-write the results.
+    ASINs still fresh in the result cache (younger than max_age) are skipped.
+    Pages left unfinished by a robot-check block are requeued as a delayed job;
+    whatever was scraped before the block is still written.
+    """
+    def run(progress):
+        results = scrape_from_search_pages(keyword, pages, persist=False, progress=progress,
+                                           page_numbers=page_numbers, workers=workers)
+        retry_job_id = requeue_search(keyword, results.pending_pages, results.retry_after, max_age, attempt, workers)
+        if not results and not retry_job_id:
+            raise RuntimeError("No data scraped")
+
+        fresh, stale = result_cache.partition([r["asin"] for r in results], max_age)
+        stale = set(stale)
+        to_write = [r for r in results if r["asin"] in stale]
+
+        # One membership pass + bulk INSERT ... ON CONFLICT instead of a SELECT + INSERT per row
+        added, existing = get_writer().write_many(to_write, run_id=new_run_id(), on_conflict="update")
+        for item in to_write:
+            result_cache.put(item)
+
+        return {
+            "message": f"Scraping complete for '{keyword}'" if not results.pending_pages
+                       else f"Blocked; pages {results.pending_pages} requeued for '{keyword}'",
+            "added": added,
+            "existing": existing,
+            "skipped": len(results) - len(to_write),
+            "pending_pages": results.pending_pages,
+            "retry_job_id": retry_job_id,
+            "cache": result_cache.snapshot(),
+        }
+    return run
+
+
+def queued_search_job(job_id, keyword, pages, max_age=None):
+    """
+    Job body for /run-scraper with WORK_QUEUE=1: enqueue one item per page
+    under this job's id, then follow the worker nodes' progress. Workers
+    skip ASINs still fresh in their result cache (younger than max_age).
+    """
+    def run(progress):
+        work_queue.enqueue(job_id, "page", [page_payload(keyword, p, max_age) for p in range(1, pages + 1)])
+        work_queue.wait(job_id, progress=lambda open_: progress(pages_done=pages - open_))
+
+        outcomes = work_queue.outcomes(job_id)
+        done = [r for state, r, _ in outcomes.values() if state == "done"]
+        failed_pages = sorted(json.loads(p)["page"] for p, (state, _, _) in outcomes.items() if state == "failed")
+        if not any(r.get("items") for r in done):
+            raise RuntimeError("No data scraped")
+        return {
+            "message": f"Scraping complete for '{keyword}'" if not failed_pages
+                       else f"Pages {failed_pages} failed for '{keyword}'",
+            "added": sum(r.get("added", 0) for r in done),
+            "skipped": sum(r.get("skipped", 0) for r in done),
+            "items": len({asin for r in done for asin in r.get("asins", [])}),
+            "failed_pages": failed_pages,
+            "queue": work_queue.counts(job_id),
+        }
+    return run
+
+
+def submit_job(*args, **kwargs):
+    """job_manager.submit, with a saturated scrape executor answered as 429 + Retry-After."""
+    try:
+        return job_manager.submit(*args, **kwargs)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Scraper busy ({e.pending} jobs queued or running), retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def job_accepted(job, message):
+    return {
+        "message": message,
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }
+
+
+@app.post("/run-scraper", status_code=202)
+async def run_scraper(request: ScraperRequest):
+    """Queue a search scrape on the scrape executor and return its job id right away."""
     keyword = request.keyword.strip()
     if not keyword:
         raise HTTPException(status_code=400, detail="Keyword cannot be empty")
 
-    try:
-        results = scrape_from_search_pages(keyword, request.pages)
-        if not results:
-            raise HTTPException(status_code=404, detail="No data scraped")
-
-        db = SessionLocal()
-        added, skipped = 0, 0
-
-        for item in results:
-            asin = item.get("asin")
-            if not asin:
-                continue
-
-            if db.query(AmazonProduct).filter_by(asin=asin).first():
-                skipped += 1
-                continue
-
-            product = AmazonProduct(
-                asin=asin,
-                title=item.get("title", "Unknown"),
-                price=item.get("price", "N/A"),
-                currency=item.get("currency", "USD"),
-                status=item.get("status", "ok"),
-                product_url=item.get("product_url", "")
-            )
-            db.add(product)
-            added += 1
+    # One browser per worker (or one tab per worker with DRIVER_TABS); never more than exist
+    workers = max(1, min(request.workers, DRIVER_TABS if tabs_enabled() else driver_pool.size))
+    params = {"keyword": keyword, "pages": request.pages, "max_age": request.max_age, "workers": workers}
+    if work_queue:
+        # Same id for the job and its queue items: /jobs/{id} and /queue/{id}
+        job_id = job_manager.new_id()
+        job = submit_job("search", queued_search_job(job_id, keyword, request.pages, request.max_age), params,
+                         pages_total=request.pages, job_id=job_id)
+    else:
+        job = submit_job("search", search_job(keyword, request.pages, request.max_age, workers=workers), params,
+                         pages_total=request.pages)
+    return job_accepted(job, f"Scrape queued for '{keyword}'")
 
-        db.commit()
-        db.close()
 
-        return JSONResponse(content={
-            "message": f"Scraping complete for '{keyword}'",
-            "added": added,
-            "skipped": skipped
-        })
+# =========================
+# Jobs
+# =========================
+@app.get("/jobs")
+async def list_jobs(limit: int = Query(50, ge=1, le=500)):
+    return {"executor": job_manager.stats(), "jobs": [job.to_dict() for job in job_manager.list(limit)]}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Scraper failed: {str(e)}")
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Live progress as Server-Sent Events (progress ... end)."""
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_manager.events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # =========================
-# CSV Scraper (DB-only)
+# Result cache
 # =========================
-@app.post("/scrape-csv")
-async def scrape_csv(file: UploadFile = File(...)):
-    """
-    Upload a CSV containing an 'ASIN' column.
-    Scrapes each ASIN and stores the result in the database asynchronously.
-    """
-    try:
-        #  Read CSV safely
-        contents = await file.read()
-        df = pd.read_csv(StringIO(contents.decode("utf-8")))
+@app.get("/cache/stats")
+async def cache_stats():
+    return result_cache.snapshot()
 
-        #  Normalize columns
-        df.columns = [col.strip().upper() for col in df.columns]
-        if "ASIN" not in df.columns:
-            raise HTTPException(status_code=400, detail="CSV must contain an 'ASIN' column")
 
-        asins = df["ASIN"].dropna().astype(str).unique().tolist()
-        if not asins:
-            raise HTTPException(status_code=400, detail="No ASINs found in CSV")
+@app.get("/queue/{job_id}")
+async def queue_status(job_id: str):
+    """Work queue items of a job by state (WORK_QUEUE=1)."""
+    if not work_queue:
+        raise HTTPException(status_code=404, detail="Work queue is disabled (WORK_QUEUE=0)")
+    return await run_in_threadpool(work_queue.counts, job_id)
 
-        added, skipped, failed = 0, 0, 0
 
-        db = SessionLocal()
+@app.get("/breaker")
+async def breaker_status():
+    """Circuit breaker state per host (closed / open / half_open, trips, retry_after)."""
+    return breaker.snapshot()
 
-        #  Async loop
-        for asin in asins:
-            asin = asin.strip()
-            if not asin:
-                continue
 
-            #  Check duplicates in DB
-            result = await db.execute(select(AmazonProduct).where(AmazonProduct.asin == asin))
-            existing = result.scalars().first()
-            if existing:
-                skipped += 1
-                continue
+# =========================
+# CSV Scraper (DB-only)
+# =========================
+CSV_WRITE_BATCH = 25  # scraped rows per bulk write while a CSV job runs
 
-            try:
-                print(f" Scraping ASIN: {asin}")
-                item = scrape_product_by_asin(asin)
-
-                if not item:
-                    failed += 1
-                    print(f" Failed to scrape {asin}")
-                    continue
-
-                print(f" Scraped: {item.get('title', 'Unknown')}")
-
-                product = AmazonProduct(
-                    asin=item.get("asin", asin),
-                    title=item.get("title", "Unknown"),
-                    price=item.get("price", "N/A"),
-                    currency=item.get("currency", "USD"),
-                    status=item.get("status", "ok"),
-                    product_url=item.get("product_url", "")
-                )
-
-                db.add(product)
-                await db.commit()
-                added += 1
-
-            except Exception as scrape_error:
-                failed += 1
-                await db.rollback()
-                print(f" Error scraping {asin}: {scrape_error}")
 
-        db.close()
+def scrape_asin_batch(asins, concurrency, max_age=None, manifest=None, meter=None):
+    """
+    Serve fresh ASINs from the result cache, scrape the rest on the bounded
+    worker pool and write them in small batches as they complete.
+    Returns (meter, blocked) where `blocked` are ASINs stopped by a robot
+    check or an open circuit breaker; they are not counted as failures.
+    With a `manifest`, every ASIN's state is checkpointed as it changes.
+    """
+    meter = meter or ThroughputMeter()
+    run_id = new_run_id()
 
-        return JSONResponse(content={
-            "message": "Scraping completed from CSV",
-            "added": added,
-            "skipped": skipped,
-            "failed": failed
-        })
+    #  Fresh ASINs are served from the cache; only stale/unknown ones are scraped
+    fresh, todo = result_cache.partition(asins, max_age)
+    meter.skipped += len(fresh)
+    if manifest:
+        manifest.mark_many(fresh, "done")
+
+    def claim(asins):
+        # Marked in flight as the pool picks them up, not all at once
+        for asin in asins:
+            if manifest:
+                manifest.mark(asin, "in_flight")
+            yield asin
+
+    def write(batch):
+        try:
+            # Re-scraped ASINs that were already stored count as skipped, not added
+            added, skipped = get_writer().write_many(batch, run_id=run_id, on_conflict="update")
+            meter.added += added
+            meter.skipped += skipped
+            for item in batch:
+                result_cache.put(item)
+            if manifest:
+                manifest.mark_many((item["asin"] for item in batch), "done")
+        except Exception as db_error:
+            meter.failed += len(batch)
+            logger.error(f"[DB ERROR] Saving {len(batch)} rows failed: {db_error}")
+            if manifest:
+                manifest.mark_many((item["asin"] for item in batch), "failed", db_error)
+
+    #  Results are written in small batches as workers finish, not at the end
+    if tabs_enabled():
+        # Each browser keeps DRIVER_TABS product pages loading at once
+        outcomes = scrape_asins_pipelined(claim(todo), scrape_products, concurrency=concurrency)
+    else:
+        outcomes = scrape_asins(claim(todo), scrape_product_by_asin, concurrency=concurrency)
+    batch, blocked = [], []
+    for asin, item, error in outcomes:
+        if isinstance(error, (RobotCheckError, CircuitOpenError)):
+            # Once the breaker is open the remaining ASINs fail fast here, without a browser
+            blocked.append(asin)
+            if manifest:
+                manifest.mark(asin, "pending")
+            continue
+        if error or not item:
+            meter.failed += 1
+            logger.warning(f"[CSV] Failed to scrape {asin}: {error or 'no data'}")
+            if manifest:
+                manifest.mark(asin, "failed", error or "no data")
+            continue
+
+        logger.info(f"[CSV] Scraped: {item.get('title', 'Unknown')}")
+        batch.append(item)
+        if len(batch) >= CSV_WRITE_BATCH:
+            write(batch)
+            batch = []
+    if batch:
+        write(batch)
+    if manifest:
+        manifest.flush()
+
+    return meter, blocked
+
+
+def queue_asin_batch(asins, job_id, max_age=None, manifest=None, meter=None):
+    """
+    scrape_asin_batch for WORK_QUEUE=1: stale ASINs are enqueued under the
+    job's id and scraped by the worker nodes; this waits for their outcome.
+    Blocks are handled by the workers (items are handed back), so nothing
+    comes back as blocked.
+    """
+    meter = meter or ThroughputMeter()
+    fresh, todo = result_cache.partition(asins, max_age)
+    meter.skipped += len(fresh)
+    if manifest:
+        manifest.mark_many(fresh, "done")
+    if not todo:
+        return meter, []
+
+    work_queue.enqueue(job_id, "asin", todo)
+    if manifest:
+        manifest.mark_many(todo, "in_flight")
+        manifest.flush()
+    work_queue.wait(job_id, todo)
+
+    for asin, (state, result, error) in work_queue.outcomes(job_id, todo).items():
+        if state == "done":
+            # The worker reports whether its write added the ASIN or refreshed a stored one
+            added = result.get("added", 0)
+            meter.added += added
+            meter.skipped += 1 - added
+        else:
+            meter.failed += 1
+            logger.warning(f"[CSV] Failed to scrape {asin}: {error}")
+        if manifest:
+            manifest.mark(asin, "done" if state == "done" else "failed", error)
+    if manifest:
+        manifest.flush()
+    return meter, []
+
+
+def csv_job(job_id, concurrency, max_age=None, attempt=0):
+    """
+    Job body for /scrape-csv; runs on the scrape executor.
+    Works through the job's manifest chunk by chunk, so a restarted or
+    retried job only scrapes the ASINs that are not done yet.
+    """
+    def run(progress):
+        manifest = JobManifest(SessionLocal, job_id)
+        meter, blocked = ThroughputMeter(), []
+        try:
+            for chunk in manifest.iter_open():
+                if work_queue:
+                    _, blocked = queue_asin_batch(chunk, job_id, max_age, manifest, meter)
+                else:
+                    _, blocked = scrape_asin_batch(chunk, concurrency, max_age, manifest, meter)
+                progress(items_found=meter.added)
+                if blocked:
+                    # The breaker is open; the rest of the manifest waits for the requeue
+                    break
+        except JobCancelled:
+            # The manifest status (e.g. "rejected") was set by whoever cancelled
+            raise
+        except Exception:
+            manifest.set_status("failed")
+            raise
+
+        retry_job_id = None
+        if blocked:
+            retry_job_id = requeue_manifest(job_id, concurrency, max_age, attempt + 1)
+        if not retry_job_id:
+            manifest.set_status("done")
+        counts = manifest.counts()
+        return {
+            "message": "Scraping completed from CSV" if not blocked
+                       else f"Blocked by robot check; {counts['pending'] + counts['in_flight']} ASINs requeued",
+            "concurrency": concurrency,
+            **meter.summary(),
+            "manifest": counts,
+            "retry_job_id": retry_job_id,
+            "cache": result_cache.snapshot(),
+        }
+    return run
+
+
+def requeue_manifest(job_id, concurrency, max_age, attempt):
+    """Resume the manifest as a delayed follow-up job once the breaker cools down; returns its id."""
+    if attempt > BREAKER_MAX_REQUEUES:
+        logger.warning(f"[JOB] Giving up on blocked ASINs of {job_id} after {attempt - 1} requeues")
+        return None
+    job = job_manager.submit(
+        "csv-retry", csv_job(job_id, concurrency, max_age, attempt),
+        {"manifest": job_id, "attempt": attempt, "max_age": max_age},
+        delay=max(1.0, breaker.retry_after(AMAZON_BASE_URL)),
+        force=True,
+    )
+    return job.id
+
+
+# Request body schema for the docs; the endpoint parses the stream itself
+CSV_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                },
+            },
+            "text/csv": {"schema": {"type": "string"}},
+        },
+    },
+}
+
+
+async def ingest_upload(request, params):
+    """
+    Stream the uploaded CSV into a new manifest, MANIFEST_CHUNK ASINs at a
+    time. The job is submitted once the first chunk is stored, so scraping
+    starts while the rest of the upload is still arriving.
+    Returns (job or None when the CSV held no ASINs, parser).
+    """
+    parser = AsinCsvParser()
+    try:
+        stream = UploadStream(request.headers.get("content-type"), parser)
+    except CsvFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    job_id = job_manager.new_id()
+    manifest = job = None
+
+    async def store(asins):
+        nonlocal manifest, job
+        if manifest is None:
+            manifest = await run_in_threadpool(JobManifest.begin, SessionLocal, job_id, "csv", params)
+        await run_in_threadpool(manifest.append, asins)
+        if job is None:
+            try:
+                job = submit_manifest_job(job_id, params)
+            except HTTPException:
+                # Refused with 429: the manifest must not be resumed later
+                await run_in_threadpool(manifest.set_status, "rejected")
+                raise
 
+    batch = []
+    try:
+        async for chunk in request.stream():
+            # Parsing a chunk takes tens of ms; keep it off the event loop
+            batch.extend(await run_in_threadpool(stream.feed, chunk))
+            if len(batch) >= MANIFEST_CHUNK:
+                await store(batch)
+                batch = []
+        batch.extend(stream.close())
+        if batch:
+            await store(batch)
+    except CsvFormatError as e:
+        if manifest is not None:
+            # Chunks before the bad row were already queued; stop the job they started
+            await run_in_threadpool(manifest.set_status, "rejected")
+            if job is not None:
+                job_manager.cancel(job.id, f"upload rejected: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except ClientDisconnect:
+        # Keep the complete rows that arrived; the cut-off last line is dropped
+        if batch:
+            await store(batch)
+        logger.warning(f"[UPLOAD] {job_id} interrupted after {len(parser.seen)} ASINs")
+    finally:
+        if manifest is not None:
+            await run_in_threadpool(manifest.finish_receiving)
+    params["asins"] = len(parser.seen)
+    return job, parser
+
+
+def submit_manifest_job(job_id, params, force=False):
+    """Queue csv_job for a stored manifest (new upload, resume or retry)."""
+    return submit_job(
+        "csv", csv_job(job_id, params["concurrency"], params.get("max_age")),
+        params, force=force, job_id=job_id,
+    )
+
+
+@app.post("/scrape-csv", openapi_extra=CSV_UPLOAD_OPENAPI)
+async def scrape_csv(
+    request: Request,
+    concurrency: int = Query(CSV_CONCURRENCY, ge=1, description="Parallel browser workers"),
+    max_age: Optional[int] = Query(None, ge=0, description="Re-scrape ASINs older than this many seconds (default CACHE_TTL_SECONDS)"),
+    wait: bool = Query(True, description="Hold the response until the scrape finishes; false returns 202 + job id"),
+):
+    """
+    Upload a CSV containing an 'ASIN' column, as multipart/form-data (`file`)
+    or as a raw text/csv body.
+    ASINs scraped within `max_age` seconds are served from the result cache;
+    the rest are scraped on a bounded pool of browser workers and stored in
+    small batches as they complete. ASINs blocked by a robot check are
+    requeued as a delayed `csv-retry` job (see `retry_job_id`).
+
+    The upload is parsed as it streams in: values that are not ASINs are
+    rejected, duplicates dropped, and scraping begins before the last byte
+    arrives. The scrape runs as a job on the scrape executor, never on the
+    event loop; when the executor is saturated the upload is refused with 429.
+    Per-ASIN progress is checkpointed in a manifest (GET /jobs/{id}/manifest):
+    the job survives a restart, and POST /jobs/{id}/retry re-runs only the
+    ASINs that failed.
+    """
+    try:
+        # One browser per worker; never ask for more than the pool can hand out
+        concurrency = min(concurrency, driver_pool.size)
+        params = {"concurrency": concurrency, "max_age": max_age}
+        job, parser = await ingest_upload(request, params)
+        if job is None:
+            raise HTTPException(status_code=400, detail={"message": "No ASINs found in CSV", "upload": parser.summary()})
+
+        if not wait:
+            return JSONResponse(status_code=202, content={
+                **job_accepted(job, f"CSV scrape queued ({params['asins']} ASINs)"),
+                "upload": parser.summary(),
+            })
+
+        # The event loop stays free while the job runs
+        await asyncio.wrap_future(job.future)
+        if job.status == "failed":
+            raise HTTPException(status_code=500, detail=f"CSV scrape failed: {job.error}")
+        return JSONResponse(content={**job.result, "job_id": job.id, "upload": parser.summary()})
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"CSV scrape failed: {e}")
 
+
+@app.get("/jobs/{job_id}/manifest")
+def job_manifest(job_id: str, failed_limit: int = Query(100, ge=0, le=10000)):
+    """Stored state of a bulk job: per-state ASIN counts and the failed ASINs with their errors."""
+    stored = get_bulk_job(SessionLocal, job_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Unknown bulk job")
+    manifest = JobManifest(SessionLocal, job_id)
+    return {**stored, "counts": manifest.counts(), "failed": manifest.failed(failed_limit)}
+
+
+@app.post("/jobs/{job_id}/retry", status_code=202)
+def retry_bulk_job(job_id: str, max_attempts: int = Query(MANIFEST_MAX_ATTEMPTS, ge=1)):
+    """Re-run only the failed ASINs of a bulk job (those with fewer than `max_attempts` tries)."""
+    stored = get_bulk_job(SessionLocal, job_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Unknown bulk job")
+    running = job_manager.get(job_id)
+    if running and not running.finished:
+        raise HTTPException(status_code=409, detail="Job is still running")
+
+    manifest = JobManifest(SessionLocal, job_id)
+    retried = manifest.retry_failed(max_attempts)
+    if not retried:
+        return JSONResponse(status_code=200, content={"message": "Nothing to retry", "counts": manifest.counts()})
+    manifest.set_status("running")
+    job = submit_manifest_job(job_id, stored["params"])
+    return job_accepted(job, f"Retrying {retried} failed ASINs")
+
+
+@app.on_event("startup")
+def resume_bulk_jobs():
+    """Pick up bulk jobs a previous process left running (crash, redeploy)."""
+    if not MANIFEST_RESUME:
+        return
+    for stored in unfinished_jobs(SessionLocal):
+        if job_manager.get(stored["id"]):
+            continue
+        if stored["status"] == "receiving":
+            # No more ASINs will arrive; scrape the ones that were stored
+            JobManifest(SessionLocal, stored["id"]).finish_receiving()
+        submit_manifest_job(stored["id"], stored["params"], force=True)
+        logger.info(f"[JOB] Resuming bulk job {stored['id']} ({stored['total']} ASINs)")
+
 # =========================
-# Download CSV (from DB)
+# Price history (paginated)
 # =========================
-@app.get("/download_csv")
-def download_csv(mode: str = "combined"):
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+@app.get("/prices")
+def list_prices(
+    request: Request,
+    asin: Optional[str] = Query(None, description="One ASIN or a comma-separated list"),
+    status: Optional[str] = Query(None, description="Only rows with this status (ok, no_price, ...)"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    start: Optional[datetime.datetime] = Query(None, description="scraped_at >= start (ISO 8601)"),
+    end: Optional[datetime.datetime] = Query(None, description="scraped_at < end (ISO 8601)"),
+    fields: Optional[str] = Query(None, description=f"Comma-separated fields (default {','.join(DEFAULT_FIELDS)})"),
+    limit: int = Query(PRICES_PAGE_SIZE, ge=1, le=PRICES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+):
+    """
+    Price observations, newest first, one page at a time. Pass the returned
+    `next_cursor` to get the next page (null on the last one). Every page is
+    an index range scan, however deep. Responses carry an ETag; send it back
+    in If-None-Match and an unchanged page is answered with an empty 304.
+    """
+    asins = [a.strip().upper() for a in asin.split(",") if a.strip()] if asin else None
     db = SessionLocal()
     try:
-        products = db.query(AmazonProduct).all()
+        page = fetch_prices(
+            db, parse_fields(fields), limit=limit, asins=asins, status=status,
+            min_price=min_price, max_price=max_price, start=start, end=end, cursor=cursor,
+        )
+    except InvalidQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
     finally:
         db.close()
 
-    if not products:
-        raise HTTPException(status_code=404, detail="No data in database")
+    body = json.dumps(page, separators=(",", ":")).encode()
+    headers = {"ETag": page_etag(body), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
-    df = pd.DataFrame([{
-        "ASIN": p.asin,
-        "Title": p.title,
-        "Price": p.price,
-        "Currency": p.currency,
-        "Status": p.status,
-        "Product URL": p.product_url
-    } for p in products])
+# =========================
+# Download CSV (from DB)
+# =========================
+@app.get("/download_csv")
+def download_csv(
+    mode: str = "combined",
+    status: Optional[str] = Query(None, description="Only rows with this status (ok, no_price, ...)"),
+    start: Optional[datetime.datetime] = Query(None, description="created_at >= start (ISO 8601)"),
+    end: Optional[datetime.datetime] = Query(None, description="created_at < end (ISO 8601)"),
+    gzip: bool = Query(False, description="Send amazon_products.csv.gz"),
+):
+    """Stream the products table as CSV in constant memory (optionally gzip-compressed)."""
+    stmt = export_query(status, start, end)
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
-        df.to_csv(tmp.name, index=False)
-        tmp_path = tmp.name
+    db = SessionLocal()
+    try:
+        if db.execute(stmt.limit(1)).first() is None:
+            raise HTTPException(status_code=404, detail="No data in database")
+    finally:
+        db.close()
 
-    return FileResponse(tmp_path, media_type="text/csv", filename="amazon_products.csv")
+    chunks = iter_csv(SessionLocal, stmt)
+    if gzip:
+        return StreamingResponse(
+            gzip_stream(chunks),
+            media_type="application/gzip",
+            headers={"Content-Disposition": 'attachment; filename="amazon_products.csv.gz"'},
+        )
+    return StreamingResponse(
+        chunks,
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="amazon_products.csv"'},
+    )
 
 
 # =========================
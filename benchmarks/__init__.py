@@ -0,0 +1,8 @@
+"""
+Offline benchmarks: saved Amazon pages served by a local stub site, so
+scraper throughput can be measured (and compared across commits) without
+touching amazon.com.
+
+    python -m benchmarks.run                      # writes benchmarks/results/<commit>.json
+    python -m benchmarks.compare base.json new.json
+"""
@@ -0,0 +1,86 @@
+"""
+Before/after timing for search-page extraction on the saved fixture pages.
+
+    python benchmarks/bench_extract.py [--runs 50]
+
+"after"  = extractors.parse_search_results over one page_source string.
+"before" = the old per-field WebDriver loop, run against the same fixture via
+           file:// (only when Chrome/chromedriver are available).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from extractors import parse_search_results, parse_product_page  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SEARCH_PAGE = os.path.join(FIXTURES, "search_results.html")
+PRODUCT_PAGE = os.path.join(FIXTURES, "product_page.html")
+
+
+def _timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def bench_after(runs):
+    with open(SEARCH_PAGE, encoding="utf-8") as f:
+        search_html = f.read()
+    with open(PRODUCT_PAGE, encoding="utf-8") as f:
+        product_html = f.read()
+
+    items = parse_search_results(search_html)
+    p50, worst = _timed(lambda: parse_search_results(search_html), runs)
+    print(f"[after]  search page: {len(items)} items  median {p50:.2f} ms  max {worst:.2f} ms")
+    p50, worst = _timed(lambda: parse_product_page(product_html, "B000000000"), runs)
+    print(f"[after]  product page:           median {p50:.2f} ms  max {worst:.2f} ms")
+
+
+def bench_before(runs):
+    try:
+        from selenium.webdriver.common.by import By
+        from scraper import start_driver
+        driver = start_driver(headless=True)
+    except Exception as e:
+        print(f"[before] skipped (no browser available: {e.__class__.__name__})")
+        return
+
+    def legacy_loop():
+        for item in driver.find_elements(By.CSS_SELECTOR, "div.s-main-slot div[data-asin][data-component-type='s-search-result']"):
+            item.get_attribute("data-asin")
+            try:
+                item.find_element(By.CSS_SELECTOR, "h2 a").get_attribute("href")
+            except Exception:
+                pass
+            for sel in ["h2 a span", "span.a-price span.a-offscreen", "span.a-price-whole"]:
+                try:
+                    item.find_element(By.CSS_SELECTOR, sel).text
+                except Exception:
+                    continue
+
+    try:
+        driver.get("file://" + SEARCH_PAGE)
+        p50, worst = _timed(legacy_loop, max(1, runs // 10))
+        print(f"[before] search page (WebDriver per field): median {p50:.2f} ms  max {worst:.2f} ms")
+        p50, worst = _timed(lambda: parse_search_results(driver.page_source), max(1, runs // 10))
+        print(f"[after]  search page incl. page_source:    median {p50:.2f} ms  max {worst:.2f} ms")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extraction before/after timings")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    bench_after(args.runs)
+    bench_before(args.runs)
@@ -0,0 +1,75 @@
+"""
+Page load time and bytes transferred per driver profile (lean vs. full).
+
+    python -m benchmarks.bench_profiles [--url https://www.amazon.com/s?k=laptop] [--runs 5] [--kind search]
+
+Without --url the stub site's search page is used. It has no subresources,
+so only the eager-load saving shows there; point --url at a real page to
+measure the bandwidth saved by resource blocking. Transfer sizes come from
+the browser's Resource Timing entries (navigation + every subresource).
+Needs Chrome; reports "skipped" without it.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.stub_server import serve_in_thread  # noqa: E402
+
+TRANSFER_JS = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return [entries.reduce((n, e) => n + (e.transferSize || 0), 0), entries.length];
+"""
+
+
+def measure(profile, url, kind, runs):
+    from scraper import start_driver
+    from driver_profiles import wait_for_content
+
+    driver = start_driver(headless=True, profile=profile)
+    try:
+        times, sizes, requests = [], [], []
+        for _ in range(runs):
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            t0 = time.perf_counter()
+            driver.get(url)
+            wait_for_content(driver, kind)
+            times.append((time.perf_counter() - t0) * 1000)
+            size, count = driver.execute_script(TRANSFER_JS)
+            sizes.append(size)
+            requests.append(count)
+        return statistics.median(times), statistics.median(sizes), statistics.median(requests)
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lean vs. full driver profile")
+    parser.add_argument("--url")
+    parser.add_argument("--kind", choices=["search", "product"], default="search")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    url = args.url
+    if not url:
+        _, base_url = serve_in_thread()
+        url = f"{base_url}/s?k=laptop&page=1"
+
+    results = {}
+    for profile in ("full", "lean"):
+        try:
+            results[profile] = measure(profile, url, args.kind, args.runs)
+        except Exception as e:
+            print(f"[{profile}] skipped (no browser available: {e.__class__.__name__})")
+            continue
+        load_ms, size, count = results[profile]
+        print(f"[{profile}] load+wait median {load_ms:.0f} ms  transferred {size / 1024:.0f} KiB  requests {count:.0f}")
+
+    if len(results) == 2:
+        (full_ms, full_size, _), (lean_ms, lean_size, _) = results["full"], results["lean"]
+        print(f"lean saves {100 * (1 - lean_ms / full_ms):.0f}% load time"
+              + (f", {100 * (1 - lean_size / full_size):.0f}% bytes" if full_size else ""))
@@ -0,0 +1,76 @@
+"""
+Compare two benchmark result files written by benchmarks/run.py.
+
+    python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json [--threshold 10] [--fail]
+
+A case regresses when its p50 latency grows, or its items/s drops, by more
+than --threshold percent. With --fail the exit status is 1 on any regression.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def fmt(value, pct):
+    if value is None:
+        return f"{'-':>22}"
+    delta = f"({pct:+.1f}%)" if pct is not None else ""
+    return f"{value:>12.1f} {delta:>9}"
+
+
+def compare(base, new, threshold=10.0):
+    """Rows of (case, base p50, new p50, p50 change %, base items/s, new items/s, items/s change %, regressed)."""
+    rows = []
+    for case in sorted(set(base["results"]) | set(new["results"])):
+        b = base["results"].get(case, {})
+        n = new["results"].get(case, {})
+        if "p50_ms" not in b or "p50_ms" not in n:
+            rows.append((case, b.get("p50_ms"), n.get("p50_ms"), None, None, None, None, False))
+            continue
+        p50_pct = change(b["p50_ms"], n["p50_ms"])
+        ips_pct = change(b.get("items_per_second"), n.get("items_per_second"))
+        regressed = (p50_pct is not None and p50_pct > threshold) or (ips_pct is not None and ips_pct < -threshold)
+        rows.append((case, b["p50_ms"], n["p50_ms"], p50_pct,
+                     b.get("items_per_second"), n.get("items_per_second"), ips_pct, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--fail", action="store_true", help="exit 1 when any case regresses")
+    args = parser.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    print(f"base: {base['meta']['commit']} ({base['meta']['timestamp']})")
+    print(f"new:  {new['meta']['commit']} ({new['meta']['timestamp']})\n")
+    print(f"{'case':<22}{'p50 ms base':>14}{'p50 ms new':>22}{'items/s base':>14}{'items/s new':>22}")
+
+    rows = compare(base, new, args.threshold)
+    for case, b50, n50, p50_pct, bips, nips, ips_pct, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        base_p50 = f"{b50:>14.1f}" if b50 is not None else f"{'-':>14}"
+        base_ips = f"{bips:>14.1f}" if bips is not None else f"{'-':>14}"
+        print(f"{case:<22}{base_p50}{fmt(n50, p50_pct)}{base_ips}{fmt(nips, ips_pct)}{flag}")
+
+    regressions = [r[0] for r in rows if r[-1]]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:g}%: {', '.join(regressions)}")
+    return 1 if regressions and args.fail else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""
+End-to-end benchmark run against the local stub site.
+
+    python -m benchmarks.run [--runs 5] [--pages 3] [--fetcher http] [--only search_pages,api_root]
+
+Every case is timed `--runs` times after `--warmup` untimed runs and reports
+p50/p95 latency, items per second and the process' peak RSS so far. Results
+are written as JSON (default benchmarks/results/<commit>.json) for
+benchmarks/compare.py.
+
+The run is self-contained: a temporary SQLite database, the stub site as
+AMAZON_BASE_URL, page snapshots off and the rate scheduler disabled (pass
+--rate N to time runs under a politeness budget of N navigations/sec).
+driver_start needs Chrome and is reported as skipped without it.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.stub_server import serve_in_thread  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+KEYWORD = "wireless earbuds"
+PRODUCT_ASIN = "B0BENCH001"
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+
+# ----------------------
+# Environment
+# ----------------------
+def prepare_env(args, workdir, base_url):
+    """Point the app at the stub site and a scratch DB; must run before the app is imported."""
+    os.environ["AMAZON_BASE_URL"] = base_url
+    os.environ["SCRAPER_FETCHER"] = args.fetcher
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["SNAPSHOTS_ENABLED"] = "0"
+    os.environ["SNAPSHOT_DIR"] = os.path.join(workdir, "snapshots")
+    os.environ["HOST_RATE_PER_SEC"] = str(args.rate)
+    # scraper.log and scraped_csv/ land in the scratch dir
+    os.chdir(workdir)
+
+
+def create_tables():
+    import asyncio
+    import init_db
+    asyncio.run(init_db.create_tables())
+
+
+def git_commit():
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"],
+                                             cwd=ROOT, text=True).strip())
+        return sha, dirty
+    except Exception:
+        return "unknown", False
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of finished children (ru_maxrss is KiB on Linux)."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(own / scale, 1), round(children / scale, 1)
+
+
+def percentile(samples, pct):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+# ----------------------
+# Cases
+# ----------------------
+# Each case returns the number of items it produced (0 for pure latency cases).
+class Cases:
+    def __init__(self, args):
+        import scraper
+        import backend_api
+        from fastapi.testclient import TestClient
+
+        self.args = args
+        self.scraper = scraper
+        self.client = TestClient(backend_api.app)
+        self._asin_seq = 0
+
+    def _asins(self, n):
+        start, self._asin_seq = self._asin_seq, self._asin_seq + n
+        return [f"B{i:09d}" for i in range(start, start + n)]
+
+    def _items(self, n):
+        return [{
+            "asin": asin,
+            "title": f"Bench product {asin}",
+            "price": 19.99,
+            "currency": "USD",
+            "status": "ok",
+            "product_url": f"https://www.amazon.com/dp/{asin}",
+        } for asin in self._asins(n)]
+
+    # ---- scraper ----
+    def driver_start(self):
+        if not any(shutil.which(b) for b in CHROME_BINARIES):
+            raise RuntimeError("Chrome is not installed")
+        driver = self.scraper.start_driver(headless=True)
+        driver.quit()
+        return 0
+
+    def search_pages(self):
+        return len(self.scraper.scrape_from_search_pages(KEYWORD, pages=self.args.pages, persist=False))
+
+    def search_pages_parallel(self):
+        return len(self.scraper.scrape_from_search_pages(KEYWORD, pages=self.args.pages, persist=False,
+                                                         workers=self.args.workers))
+
+    def search_pages_persist(self):
+        return len(self.scraper.scrape_from_search_pages(KEYWORD, pages=self.args.pages, persist=True))
+
+    def product_page(self):
+        return 1 if self.scraper.scrape_product_by_asin(PRODUCT_ASIN) else 0
+
+    # ---- database ----
+    def save_to_db(self):
+        """The per-row helper: one membership query + INSERT + COMMIT per item."""
+        import database
+
+        async def run(items):
+            for item in items:
+                await self.scraper.save_to_db(item["asin"], item["title"], item["price"],
+                                              item["currency"], item["status"], item["product_url"])
+            await database.engine.dispose()
+
+        items = self._items(self.args.items)
+        asyncio.run(run(items))
+        return len(items)
+
+    def save_many_to_db(self):
+        """Half known, half new ASINs: one set-based membership pass, one INSERT + COMMIT."""
+        import database
+
+        async def run(items):
+            await self.scraper.save_many_to_db(items)
+            await database.engine.dispose()
+
+        known = self._items(self.args.items // 2)
+        asyncio.run(run(known))
+        items = known + self._items(self.args.items - len(known))
+        asyncio.run(run(items))
+        return len(items)
+
+    def db_write_many(self):
+        """The batch writer: one bulk upsert per batch."""
+        from db_writer import get_writer
+        items = self._items(self.args.items)
+        get_writer().write_many(items, on_conflict="update")
+        return len(items)
+
+    # ---- API ----
+    def api_root(self):
+        self.client.get("/").raise_for_status()
+        return 0
+
+    def api_run_scraper(self):
+        """Submit a search job and poll it to completion."""
+        resp = self.client.post("/run-scraper", json={"keyword": KEYWORD, "pages": self.args.pages, "max_age": 0})
+        resp.raise_for_status()
+        job_url = resp.json()["status_url"]
+        while True:
+            job = self.client.get(job_url).json()
+            if job["status"] in ("done", "failed"):
+                break
+            time.sleep(0.01)
+        if job["status"] == "failed":
+            raise RuntimeError(job["error"])
+        return job["progress"]["items_found"]
+
+    def api_download_csv(self):
+        resp = self.client.get("/download_csv")
+        resp.raise_for_status()
+        return max(0, resp.text.count("\n") - 1)
+
+    def api_cache_stats(self):
+        self.client.get("/cache/stats").raise_for_status()
+        return 0
+
+
+CASES = [
+    "driver_start",
+    "search_pages",
+    "search_pages_parallel",
+    "search_pages_persist",
+    "product_page",
+    "save_to_db",
+    "save_many_to_db",
+    "db_write_many",
+    "api_root",
+    "api_run_scraper",
+    "api_download_csv",
+    "api_cache_stats",
+]
+
+
+def run_case(fn, runs, warmup, quiet=True):
+    out = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    with out:
+        for _ in range(warmup):
+            fn()
+        samples, items = [], 0
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            items += fn()
+            samples.append(time.perf_counter() - t0)
+
+    total = sum(samples)
+    rss, children_rss = peak_rss_mb()
+    return {
+        "runs": runs,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "mean_ms": round(total / runs * 1000, 3),
+        "items": items,
+        "items_per_second": round(items / total, 2) if items and total > 0 else None,
+        "peak_rss_mb": rss,
+        "peak_rss_children_mb": children_rss,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline scraper benchmarks against the local stub site")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--pages", type=int, default=3, help="search pages per scrape")
+    parser.add_argument("--items", type=int, default=200, help="rows per DB case")
+    parser.add_argument("--workers", type=int, default=4, help="parallel page workers (search_pages_parallel)")
+    parser.add_argument("--fetcher", default="http", choices=["http", "selenium", "auto"])
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the stub adds to every response")
+    parser.add_argument("--only", help="comma-separated case names")
+    parser.add_argument("--rate", type=float, default=0.0, help="navigations/sec per host (0 = unthrottled)")
+    parser.add_argument("--out", help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--verbose", action="store_true", help="show scraper output")
+    args = parser.parse_args(argv)
+
+    selected = args.only.split(",") if args.only else CASES
+    unknown = set(selected) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    commit, dirty = git_commit()
+    out_path = os.path.abspath(args.out or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json"))
+
+    server, base_url = serve_in_thread(latency=args.latency)
+    workdir = tempfile.mkdtemp(prefix="scraper-bench-")
+    prepare_env(args, workdir, base_url)
+    create_tables()
+
+    cases = Cases(args)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    results = {}
+    print(f"{'case':<22}{'p50 ms':>10}{'p95 ms':>10}{'items/s':>10}{'rss MB':>9}")
+    for name in selected:
+        try:
+            stats = run_case(getattr(cases, name), args.runs, args.warmup, quiet=not args.verbose)
+        except Exception as e:
+            results[name] = {"skipped": f"{e.__class__.__name__}: {e}"[:200]}
+            print(f"{name:<22}  skipped ({e.__class__.__name__})")
+            continue
+        results[name] = stats
+        ips = stats["items_per_second"]
+        print(f"{name:<22}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+              f"{ips if ips is not None else '-':>10}{stats['peak_rss_mb']:>9}")
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "fetcher": args.fetcher,
+            "runs": args.runs,
+            "warmup": args.warmup,
+            "pages": args.pages,
+            "items": args.items,
+            "latency": args.latency,
+            "rate": args.rate,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out_path}")
+
+    server.shutdown()
+    return report
+
+
+if __name__ == "__main__":
+    main()
+    # Background pools (driver pool, batch writer, job workers) are daemon threads
+    sys.stdout.flush()
+    os._exit(0)
@@ -0,0 +1,98 @@
+"""
+Local stand-in for amazon.com that serves the saved fixture pages.
+
+    python benchmarks/stub_server.py --port 8765
+    AMAZON_BASE_URL=http://127.0.0.1:8765 SCRAPER_FETCHER=http python ...
+
+Routes:
+    /s?k=<kw>&page=N   search_results.html (empty results page past --pages)
+    /dp/<ASIN>         product_page.html
+    /robot             robot_check.html
+Responses are gzip-encoded when the client asks for it. Setting
+`server.RequestHandlerClass.blocked = True` makes every search/product
+route answer with the robot check page (circuit breaker tests).
+"""
+import argparse
+import gzip
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+EMPTY_SEARCH = "<html><body><div class='s-main-slot s-result-list'></div></body></html>"
+
+
+def _load(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = 20
+    latency = 0.0
+    blocked = False
+
+    search_html = _load("search_results.html")
+    product_html = _load("product_page.html")
+    robot_html = _load("robot_check.html")
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, body, status=200):
+        if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            body = gzip.compress(body, compresslevel=5)
+            encoding = "gzip"
+        else:
+            encoding = None
+        if self.latency:
+            threading.Event().wait(self.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if self.blocked and (url.path == "/s" or url.path.startswith("/dp/")):
+            self._send(self.robot_html)
+        elif url.path == "/s":
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            self._send(self.search_html if page <= self.pages else EMPTY_SEARCH.encode())
+        elif url.path.startswith("/dp/"):
+            self._send(self.product_html)
+        elif url.path == "/robot":
+            self._send(self.robot_html)
+        else:
+            self._send(b"<html><body>Not Found</body></html>", status=404)
+
+
+def serve_in_thread(host="127.0.0.1", port=0, pages=20, latency=0.0):
+    """Start the stub on a daemon thread; returns (server, base_url)."""
+    handler = type("Handler", (StubHandler,), {"pages": pages, "latency": latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve fixture pages as a fake amazon.com")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=20, help="search pages that return results")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    handler = type("Handler", (StubHandler,), {"pages": args.pages, "latency": args.latency})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Stub site on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
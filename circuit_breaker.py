@@ -0,0 +1,157 @@
+import os
+import time
+import logging
+import threading
+from urllib.parse import urlparse
+
+from metrics import timed, BREAKER_TRIPS
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+# Consecutive block pages (robot checks) that open the circuit for a host
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "1"))
+# First cooldown; doubles on every trip that follows without a success, up to the max
+BREAKER_BASE_BACKOFF = float(os.getenv("BREAKER_BASE_BACKOFF", "60"))
+BREAKER_MAX_BACKOFF = float(os.getenv("BREAKER_MAX_BACKOFF", "1800"))
+# Longest cooldown a scrape waits out inline; beyond that it stops and requeues its work
+BREAKER_MAX_WAIT = float(os.getenv("BREAKER_MAX_WAIT", "120"))
+# How often unfinished work is requeued as a follow-up job before giving up
+BREAKER_MAX_REQUEUES = int(os.getenv("BREAKER_MAX_REQUEUES", "3"))
+
+PROBE_POLL_SECONDS = 0.5
+
+
+class RobotCheckError(RuntimeError):
+    """The page came back as a robot check / block page."""
+
+    def __init__(self, url):
+        super().__init__(f"Robot check on {url}")
+        self.url = url
+
+
+class CircuitOpenError(RuntimeError):
+    """Fetching from the host is paused; retry after `retry_after` seconds."""
+
+    def __init__(self, host, retry_after):
+        super().__init__(f"Circuit open for {host}, retry in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class _HostState:
+    def __init__(self):
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.probing = False
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker shared by every worker in the process.
+
+    closed    -> requests flow; BREAKER_THRESHOLD block pages in a row trip it
+    open      -> no requests until the cooldown (exponential backoff) has passed
+    half-open -> one probe request goes out; success closes the circuit,
+                 another block page re-opens it with a doubled cooldown
+
+    Call before_request(url) before a navigation and exactly one of
+    record_success / record_block / release afterwards.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, base_backoff=BREAKER_BASE_BACKOFF,
+                 max_backoff=BREAKER_MAX_BACKOFF, max_wait=BREAKER_MAX_WAIT):
+        self.threshold = max(1, int(threshold))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url):
+        return urlparse(url).netloc or url
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+        return state
+
+    def retry_after(self, url):
+        """Seconds until the host's circuit allows requests again (0 when closed)."""
+        with self._lock:
+            state = self._state(self._host(url))
+            return max(0.0, state.open_until - time.monotonic())
+
+    def before_request(self, url, max_wait=None):
+        """
+        Return when a request to the host may go out. Cooldowns up to `max_wait`
+        seconds are waited out; longer ones raise CircuitOpenError right away,
+        so callers can requeue instead of burning a browser on a certain block.
+        """
+        host = self._host(url)
+        max_wait = self.max_wait if max_wait is None else max_wait
+        while True:
+            with self._lock:
+                state = self._state(host)
+                now = time.monotonic()
+                if state.open_until <= now and not state.probing:
+                    # After a trip the first request through is the half-open probe
+                    state.probing = state.trips > 0
+                    return
+                remaining = max(state.open_until - now, PROBE_POLL_SECONDS)
+            if remaining > max_wait:
+                raise CircuitOpenError(host, remaining)
+            with timed("breaker_wait"):
+                time.sleep(remaining)
+
+    def record_success(self, url):
+        with self._lock:
+            state = self._state(self._host(url))
+            if state.trips:
+                logger.info(f"[BREAKER] {self._host(url)} recovered, circuit closed")
+            state.failures = state.trips = 0
+            state.probing = False
+
+    def record_block(self, url):
+        """A block page was served; trips the circuit once the threshold is reached."""
+        host = self._host(url)
+        with self._lock:
+            state = self._state(host)
+            state.failures += 1
+            state.probing = False
+            if state.failures < self.threshold:
+                return 0.0
+            state.failures = 0
+            state.trips += 1
+            trips = state.trips
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (trips - 1))
+            state.open_until = time.monotonic() + backoff
+        BREAKER_TRIPS.labels(host).inc()
+        logger.warning(f"[BREAKER] Block page from {host}; pausing requests for {backoff:.0f}s (trip {trips})")
+        return backoff
+
+    def release(self, url):
+        """The request failed for another reason; free the half-open probe slot."""
+        with self._lock:
+            self._state(self._host(url)).probing = False
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: {
+                    "state": "open" if s.open_until > now else ("half_open" if s.trips else "closed"),
+                    "trips": s.trips,
+                    "retry_after": round(max(0.0, s.open_until - now), 1),
+                }
+                for host, s in self._hosts.items()
+            }
+
+
+# Process-wide breaker used by the scrapers
+breaker = CircuitBreaker()
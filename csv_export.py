@@ -0,0 +1,69 @@
+import os
+import csv
+import zlib
+from io import StringIO
+
+from sqlalchemy import select
+
+from models import AmazonProduct
+
+# ----------------------
+# Config
+# ----------------------
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = [
+    ("ASIN", AmazonProduct.asin),
+    ("Title", AmazonProduct.title),
+    ("Price", AmazonProduct.price),
+    ("Currency", AmazonProduct.currency),
+    ("Status", AmazonProduct.status),
+    ("Product URL", AmazonProduct.product_url),
+]
+
+
+def export_query(status=None, start=None, end=None):
+    """SELECT for the export, filtered by status and created_at range, in id order."""
+    stmt = select(*[col for _, col in EXPORT_COLUMNS]).order_by(AmazonProduct.id)
+    if status:
+        stmt = stmt.where(AmazonProduct.status == status)
+    if start:
+        stmt = stmt.where(AmazonProduct.created_at >= start)
+    if end:
+        stmt = stmt.where(AmazonProduct.created_at < end)
+    return stmt
+
+
+def _csv_chunk(rows, header=None):
+    buf = StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
+def iter_csv(session_factory, stmt, header=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield CSV text one batch at a time. yield_per streams from a server-side
+    cursor, so memory stays flat no matter how large the table is.
+    """
+    header = header or [name for name, _ in EXPORT_COLUMNS]
+    db = session_factory()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        yield _csv_chunk([], header)
+        for rows in result.partitions():
+            yield _csv_chunk(rows)
+    finally:
+        db.close()
+
+
+def gzip_stream(chunks):
+    """Compress a stream of text chunks into a single gzip member on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,185 @@
+import csv
+import codecs
+import logging
+
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+
+from extractors import ASIN_RE
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+INVALID_SAMPLE = 10  # rejected values echoed back in the response
+
+
+class CsvFormatError(ValueError):
+    """The upload is not a CSV with an ASIN column."""
+
+
+class AsinSet:
+    """
+    Dedupe set for ASINs. Each 10-char [A-Z0-9] ASIN is stored as its
+    base-36 integer, which takes about half the memory of the str - this
+    matters for uploads with millions of rows.
+    """
+
+    def __init__(self):
+        self._seen = set()
+
+    def add(self, asin):
+        """Add `asin`; False if it was already there."""
+        key = int(asin, 36)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def __len__(self):
+        return len(self._seen)
+
+
+class AsinCsvParser:
+    """
+    Incremental CSV parser: feed() it raw bytes as they arrive and get back
+    the new, valid, unique ASINs from the complete lines seen so far.
+    Only the current partial line is buffered, never the whole file.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._partial = ""
+        self._column = None
+        self.seen = AsinSet()
+        self.rows = self.duplicates = self.invalid = 0
+        self.invalid_sample = []
+
+    def feed(self, data):
+        text = self._partial + self._decoder.decode(data)
+        lines = text.splitlines(keepends=True)
+        # The last line may continue in the next chunk
+        self._partial = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        return self._parse(lines)
+
+    def close(self):
+        text = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        asins = self._parse([text] if text else [])
+        if self._column is None:
+            raise CsvFormatError("CSV is empty")
+        return asins
+
+    def _parse(self, lines):
+        asins = []
+        for row in csv.reader(lines):
+            if self._column is None:
+                self._header(row)
+                continue
+            if self._column >= len(row):
+                continue
+            value = row[self._column].strip().upper()
+            if not value:
+                continue
+            self.rows += 1
+            if not ASIN_RE.fullmatch(value):
+                self.invalid += 1
+                if len(self.invalid_sample) < INVALID_SAMPLE:
+                    self.invalid_sample.append(value[:40])
+            elif self.seen.add(value):
+                asins.append(value)
+            else:
+                self.duplicates += 1
+        return asins
+
+    def _header(self, row):
+        #  Normalize columns
+        columns = [col.strip().upper() for col in row]
+        if "ASIN" not in columns:
+            raise CsvFormatError("CSV must contain an 'ASIN' column")
+        self._column = columns.index("ASIN")
+
+    def summary(self):
+        return {
+            "rows": self.rows,
+            "unique": len(self.seen),
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "invalid_sample": self.invalid_sample,
+        }
+
+
+class UploadStream:
+    """
+    Pulls the CSV bytes out of a request body as it streams in: either a
+    multipart/form-data upload (first file part) or a raw text/csv body.
+    The multipart parser runs incrementally, so nothing is spooled to disk.
+    """
+
+    def __init__(self, content_type, csv_parser):
+        self.csv = csv_parser
+        self._asins = []
+        self._in_file = False
+        self._file_done = False
+        self._multipart = None
+
+        mime, options = parse_options_header(content_type or "")
+        if mime == b"multipart/form-data":
+            boundary = options.get(b"boundary")
+            if not boundary:
+                raise CsvFormatError("Multipart upload without a boundary")
+            self._header_field = self._header_value = b""
+            self._part_headers = {}
+            self._multipart = MultipartParser(boundary, {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            })
+
+    def feed(self, chunk):
+        """New ASINs completed by this chunk of the request body."""
+        if self._multipart is None:
+            return self.csv.feed(chunk)
+        self._multipart.write(chunk)
+        asins, self._asins = self._asins, []
+        return asins
+
+    def close(self):
+        if self._multipart is not None:
+            self._multipart.finalize()
+            if not self._file_done:
+                raise CsvFormatError("No file in the upload")
+        return self.csv.close()
+
+    # ---- multipart callbacks ----
+    def _on_part_begin(self):
+        self._part_headers = {}
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._part_headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._part_headers.get(b"content-disposition", b""))
+        # Only the first file part is the CSV; plain form fields are ignored
+        self._in_file = b"filename" in options and not self._file_done
+
+    def _on_part_data(self, data, start, end):
+        if self._in_file:
+            self._asins.extend(self.csv.feed(data[start:end]))
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._file_done = True
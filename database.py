@@ -7,6 +7,12 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
 
+
+def sync_url(url=DATABASE_URL):
+    """The same database for a synchronous engine (aiosqlite -> pysqlite, asyncpg -> psycopg2)."""
+    return url.replace("+aiosqlite", "").replace("+asyncpg", "+psycopg2")
+
+
 # Create async engine
 engine = create_async_engine(DATABASE_URL, echo=False, future=True)
 
@@ -0,0 +1,221 @@
+import os
+import atexit
+import asyncio
+import logging
+import threading
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import DATABASE_URL
+from models import AmazonProduct, PriceObservation
+from observations import to_observation
+from metrics import timed, DB_ROWS, DB_ERRORS
+from membership import split_known_async
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "200"))
+DB_FLUSH_INTERVAL = float(os.getenv("DB_FLUSH_INTERVAL", "2.0"))
+# "ignore" keeps the first row per ASIN (old skip-duplicate behaviour), "update" refreshes it
+DB_ON_CONFLICT = os.getenv("DB_ON_CONFLICT", "ignore")
+# Failed flushes in a row before the buffered rows are given up on
+DB_MAX_RETRIES = int(os.getenv("DB_MAX_RETRIES", "3"))
+
+PRODUCT_COLUMNS = ["asin", "title", "price", "currency", "status", "product_url"]
+# Bind-parameter ceilings: SQLite (older builds) 999, Postgres 65535
+MAX_PARAMS = {"sqlite": 999, "postgresql": 32000}
+
+
+def to_row(item):
+    """Scraper dict -> amazon_products column values (price is stored as text)."""
+    price = item.get("price", "")
+    return {
+        "asin": item["asin"],
+        "title": item.get("title") or "Unknown",
+        "price": "" if price in (None, "") else str(price),
+        "currency": item.get("currency") or "USD",
+        "status": item.get("status") or "ok",
+        "product_url": item.get("product_url") or "",
+    }
+
+
+def build_upsert(dialect, rows, on_conflict=DB_ON_CONFLICT):
+    """One multi-row INSERT ... ON CONFLICT (asin) DO NOTHING/UPDATE."""
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    table = AmazonProduct.__table__
+    stmt = insert(table).values(rows)
+    if on_conflict == "update":
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.asin],
+            set_={c: stmt.excluded[c] for c in PRODUCT_COLUMNS if c != "asin"},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.asin])
+    return stmt
+
+
+# ----------------------
+# Batch writer
+# ----------------------
+class BatchWriter:
+    """
+    Long-lived writer for scraped rows. Rows are buffered and written as one
+    bulk upsert per batch, flushed when `batch_size` rows are waiting or every
+    `flush_interval` seconds. It owns an event loop thread and its own engine,
+    so the connection pool outlives individual scrapes.
+    """
+
+    def __init__(self, url=DATABASE_URL, batch_size=DB_BATCH_SIZE,
+                 flush_interval=DB_FLUSH_INTERVAL, on_conflict=DB_ON_CONFLICT):
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.on_conflict = on_conflict
+        self.stats = {"added": 0, "skipped": 0, "batches": 0, "errors": 0, "dropped": 0}
+
+        self._buffer = []
+        self._failed_flushes = 0
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="db-writer", daemon=True)
+        self._thread.start()
+        self._engine = self._call(self._make_engine(url))
+        self._flush_lock = self._call(self._make_lock())
+        self._ticker = asyncio.run_coroutine_threadsafe(self._tick(), self._loop)
+
+    # ---- loop plumbing ----
+    async def _make_engine(self, url):
+        return create_async_engine(url, echo=False, future=True, pool_pre_ping=True)
+
+    async def _make_lock(self):
+        return asyncio.Lock()
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._buffer:
+                await self._flush()
+
+    # ---- writes ----
+    async def _write(self, items, on_conflict=None):
+        """
+        Upsert the product rows and append one price observation per item,
+        in a single transaction. Returns (added, skipped) for this call:
+        ASINs new to amazon_products vs. ones already stored (refreshed
+        in "update" mode, left alone in "ignore" mode).
+        """
+        if not items:
+            return 0, 0
+        dialect = self._engine.dialect.name
+        chunk = max(1, MAX_PARAMS.get(dialect, 999) // len(PRODUCT_COLUMNS))
+
+        rows = [to_row(i) for i in items]
+        observations = [to_observation(i) for i in items]
+        # Last write wins for an ASIN repeated inside one batch
+        unique = list({r["asin"]: r for r in rows}.values())
+        on_conflict = on_conflict or self.on_conflict
+        async with self._flush_lock:
+            try:
+                with timed("db_commit"):
+                    async with self._engine.begin() as conn:
+                        # One set-based membership pass for the whole batch
+                        new, existing = await split_known_async(conn, [r["asin"] for r in unique])
+                        if on_conflict != "update":
+                            unique = [r for r in unique if r["asin"] not in existing]
+                        for i in range(0, len(unique), chunk):
+                            await conn.execute(build_upsert(dialect, unique[i:i + chunk], on_conflict))
+                        await conn.execute(PriceObservation.__table__.insert(), observations)
+            except Exception as e:
+                self.stats["errors"] += 1
+                DB_ERRORS.labels("batch_write").inc()
+                logger.error(f"[DB ERROR] Batch of {len(unique)} rows failed: {e}")
+                raise
+
+        added = len(new)
+        skipped = len(rows) - added
+        self.stats["added"] += added
+        self.stats["skipped"] += skipped
+        self.stats["batches"] += 1
+        DB_ROWS.labels("added").inc(added)
+        DB_ROWS.labels("skipped").inc(skipped)
+        logger.info(f"[DB] Batch written: {added} added, {skipped} skipped")
+        return added, skipped
+
+    async def _flush(self):
+        """
+        Write the buffer. A failed batch goes back to the front of the buffer
+        and is retried on the next flush; after DB_MAX_RETRIES failures in a
+        row those rows are dropped (logged and counted as "dropped").
+        """
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0, 0
+        try:
+            result = await self._write(rows)
+        except Exception as e:
+            self._failed_flushes += 1
+            if self._failed_flushes >= DB_MAX_RETRIES:
+                self._failed_flushes = 0
+                self.stats["dropped"] += len(rows)
+                DB_ROWS.labels("dropped").inc(len(rows))
+                logger.error(f"[DB ERROR] Dropping {len(rows)} buffered rows after {DB_MAX_RETRIES} failed flushes: {e}")
+            else:
+                with self._lock:
+                    self._buffer = rows + self._buffer
+                logger.warning(f"[DB] Keeping {len(rows)} rows for the next flush "
+                               f"(attempt {self._failed_flushes}/{DB_MAX_RETRIES})")
+            return 0, 0
+        self._failed_flushes = 0
+        return result
+
+    def add(self, item, run_id=None):
+        """Queue one scraped item; never blocks on the database."""
+        if not item.get("asin"):
+            return
+        item = dict(item, run_id=item.get("run_id") or run_id)
+        with self._lock:
+            self._buffer.append(item)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            asyncio.run_coroutine_threadsafe(self._flush(), self._loop)
+
+    def flush(self):
+        """Write everything buffered so far and wait for it."""
+        return self._call(self._flush())
+
+    def write_many(self, items, run_id=None, on_conflict=None):
+        """
+        Write items right away (bypassing the buffer); returns (added, skipped),
+        i.e. new ASINs vs. ASINs that were already stored.
+        """
+        items = [dict(i, run_id=i.get("run_id") or run_id) for i in items if i.get("asin")]
+        return self._call(self._write(items, on_conflict))
+
+    def close(self):
+        try:
+            self.flush()
+            self._ticker.cancel()
+            self._call(self._engine.dispose())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Process-wide writer, started on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BatchWriter()
+            atexit.register(_writer.close)
+        return _writer
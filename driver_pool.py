@@ -0,0 +1,136 @@
+import time
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------
+# Chrome Driver Pool
+# ----------------------
+class DriverPool:
+    """
+    Keeps up to `size` warm WebDriver instances and hands them out with
+    checkout()/checkin(). A driver is health-checked when it comes back and
+    recycled (quit + replaced lazily) after `max_pages` page loads.
+
+        with pool.borrow() as driver:
+            driver.get(url)
+            pool.record_page(driver)
+    """
+
+    def __init__(self, factory, size=2, max_pages=50, checkout_timeout=300):
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.max_pages = max(1, int(max_pages))
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = []  # LIFO: the warmest driver goes out first
+        self._lock = threading.Lock()
+        # Signalled whenever a driver goes idle or a slot frees up (recycle, failed start)
+        self._available = threading.Condition(self._lock)
+        self._pages = {}
+        self._created = 0
+        self._closed = False
+
+    # ---- lifecycle ----
+    def _spawn(self):
+        driver = self._factory()
+        with self._lock:
+            self._pages[id(driver)] = 0
+        logger.info(f"[POOL] Started driver ({self._created}/{self.size})")
+        return driver
+
+    def _discard(self, driver, reason):
+        with self._available:
+            # Only pool drivers hold a slot; foreign ones just get quit
+            if self._pages.pop(id(driver), None) is not None:
+                self._created -= 1
+                self._available.notify()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        logger.info(f"[POOL] Recycled driver ({reason})")
+
+    @staticmethod
+    def _healthy(driver):
+        try:
+            return driver.execute_script("return 1") == 1 and len(driver.window_handles) > 0
+        except Exception:
+            return False
+
+    # ---- public API ----
+    def checkout(self, timeout=None):
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+
+        timeout = timeout or self.checkout_timeout
+        deadline = time.monotonic() + timeout
+        with self._available:
+            # Wait for an idle driver or a free slot, whichever comes first
+            while not self._idle and self._created >= self.size:
+                if self._closed:
+                    raise RuntimeError("DriverPool is closed")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No driver available after {timeout}s")
+                self._available.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+
+        try:
+            return self._spawn()
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+
+    def checkin(self, driver, broken=False):
+        if driver is None:
+            return
+        pages = self._pages.get(id(driver), 0)
+
+        if self._closed:
+            self._discard(driver, "pool closed")
+        elif broken or not self._healthy(driver):
+            self._discard(driver, "failed health check")
+        elif pages >= self.max_pages:
+            self._discard(driver, f"{pages} pages served")
+        else:
+            with self._available:
+                self._idle.append(driver)
+                self._available.notify()
+
+    def record_page(self, driver, count=1):
+        """Count page loads against the driver's recycle budget (no-op for foreign drivers)."""
+        with self._lock:
+            if id(driver) in self._pages:
+                self._pages[id(driver)] += count
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        driver = self.checkout(timeout)
+        broken = False
+        try:
+            yield driver
+        except BaseException:
+            broken = not self._healthy(driver)
+            raise
+        finally:
+            self.checkin(driver, broken=broken)
+
+    def stats(self):
+        with self._lock:
+            return {"size": self.size, "started": self._created, "idle": len(self._idle)}
+
+    def close(self):
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for driver in idle:
+            self._discard(driver, "pool closed")
@@ -0,0 +1,84 @@
+import os
+import logging
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+# "lean": no images/fonts/CSS/media/ads/trackers, eager page loads (default)
+# "full": a regular browser, loads every resource
+DRIVER_PROFILE = os.getenv("DRIVER_PROFILE", "lean")
+
+# Chrome content settings: 2 = block
+LEAN_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.managed_default_content_settings.plugins": 2,
+    "profile.managed_default_content_settings.popups": 2,
+    "profile.managed_default_content_settings.geolocation": 2,
+    "profile.default_content_setting_values.notifications": 2,
+}
+
+# Network.setBlockedURLs patterns (CDP); the scraper only reads text nodes
+BLOCKED_URL_PATTERNS = [
+    # images, fonts, stylesheets, media
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+    "*.mp4", "*.webm", "*.m3u8",
+    # ads, beacons and trackers
+    "*amazon-adsystem.com*", "*aax-*.amazon.com*", "*fls-na.amazon.com*", "*unagi.amazon.com*",
+    "*/uedata*", "*/csm/*", "*doubleclick.net*", "*googletagmanager.com*", "*google-analytics.com*",
+]
+
+# What must be on the page for it to count as rendered
+WAIT_SELECTORS = {
+    "search": "div.s-main-slot [data-asin]",
+    "product": "#productTitle",
+}
+
+
+def apply_profile(options, profile=DRIVER_PROFILE):
+    """Add the profile's preferences and page-load strategy to ChromeOptions (before start)."""
+    if profile == "full":
+        return options
+    if profile != "lean":
+        raise ValueError(f"Unknown driver profile '{profile}' (expected lean or full)")
+
+    options.add_experimental_option("prefs", LEAN_PREFS)
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--disable-remote-fonts")
+    # Return after DOMContentLoaded; callers wait for the element they need
+    options.page_load_strategy = "eager"
+    return options
+
+
+def enable_request_blocking(driver, profile=DRIVER_PROFILE):
+    """Block resource and tracker URLs through CDP on a started driver (no-op for "full")."""
+    if profile == "full":
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        # Chrome options above still apply; only URL blocking is lost
+        logger.warning(f"[DRIVER] CDP request blocking unavailable: {e}")
+
+
+def wait_for_content(driver, kind, timeout=10):
+    """Wait until the element `kind` needs is present; False on timeout."""
+    try:
+        with timed("wait"):
+            WebDriverWait(driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, WAIT_SELECTORS[kind]))
+            )
+        return True
+    except Exception:
+        return False
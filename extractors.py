@@ -0,0 +1,208 @@
+import re
+from urllib.parse import urljoin
+from lxml import etree, html as lxml_html
+
+# ----------------------
+# Config
+# ----------------------
+AMAZON_BASE = "https://www.amazon.com"
+ASIN_RE = re.compile(r"([A-Z0-9]{10})")
+ROBOT_MARKERS = ("Robot Check", "Enter the characters")
+
+
+def _cls(*names):
+    """XPath predicate matching elements that carry every given CSS class."""
+    return " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {n} ')" for n in names
+    )
+
+
+# ----------------------
+# Compiled selectors
+# ----------------------
+# Each entry mirrors a CSS selector the Selenium code used, compiled once at import.
+SEARCH_CARD_XPATHS = [
+    etree.XPath("//div[" + _cls("s-main-slot") + "]//div[@data-asin and @data-component-type='s-search-result']"),
+    etree.XPath("//div[@data-asin and " + _cls("s-result-item") + "]"),
+]
+
+SEARCH_LINK_XPATH = etree.XPath(".//h2//a/@href | .//a[.//h2]/@href")
+
+# a.s-pagination-item links plus the disabled <span> Amazon uses for the last page number
+SEARCH_PAGINATION_XPATH = etree.XPath("//*[" + _cls("s-pagination-item") + "]")
+
+SEARCH_TITLE_XPATHS = [
+    etree.XPath(".//h2//a//span | .//a//h2//span"),                                 # h2 a span
+    etree.XPath(".//span[" + _cls("a-size-base-plus", "a-color-base", "a-text-normal") + "]"),
+    etree.XPath(".//span[" + _cls("a-size-medium", "a-color-base", "a-text-normal") + "]"),
+]
+
+SEARCH_PRICE_XPATHS = [
+    etree.XPath(".//span[" + _cls("a-price") + "]//span[" + _cls("a-offscreen") + "]"),
+    etree.XPath(".//span[" + _cls("a-price-whole") + "]"),
+    etree.XPath(".//span[" + _cls("a-text-price") + "]//span[" + _cls("a-offscreen") + "]"),
+]
+
+# Superset used by amazon_scraper/scraper.py::extract_price
+LEGACY_PRICE_XPATHS = [
+    SEARCH_PRICE_XPATHS[0],
+    etree.XPath(".//span[" + _cls("a-color-base", "a-text-bold") + "]"),
+    SEARCH_PRICE_XPATHS[1],
+    SEARCH_PRICE_XPATHS[2],
+]
+
+PRODUCT_TITLE_XPATHS = [
+    etree.XPath("//*[@id='productTitle']"),
+    etree.XPath("//span[@id='title']"),
+    etree.XPath("//h1//span[" + _cls("a-size-large") + "]"),
+]
+
+PRODUCT_PRICE_XPATHS = [
+    SEARCH_PRICE_XPATHS[0],
+    etree.XPath("//*[@id='corePriceDisplay_desktop_feature_div']//span[" + _cls("a-offscreen") + "]"),
+    etree.XPath("//span[@id='price_inside_buybox']"),
+    etree.XPath("//span[@id='priceblock_ourprice']"),
+    etree.XPath("//span[@id='priceblock_dealprice']"),
+]
+
+
+# ----------------------
+# Helpers
+# ----------------------
+def parse_html(page_source):
+    """Parse raw HTML once; callers pass the tree to every extractor below."""
+    if isinstance(page_source, bytes):
+        return lxml_html.document_fromstring(page_source)
+    return lxml_html.document_fromstring(page_source or "<html></html>")
+
+
+def is_robot_check(page_source):
+    return any(marker in page_source for marker in ROBOT_MARKERS)
+
+
+def _text(node):
+    return " ".join(node.text_content().split())
+
+
+def _first_text(node, xpaths):
+    for xp in xpaths:
+        for el in xp(node):
+            txt = _text(el)
+            if txt:
+                return txt
+    return None
+
+
+def parse_price(raw):
+    """'$1,299.99' -> 1299.99; returns None if nothing numeric is left."""
+    cleaned = re.sub(r"[^\d.]", "", (raw or "").replace(",", ""))
+    if not cleaned:
+        return None
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def extract_price(node, xpaths=SEARCH_PRICE_XPATHS):
+    for xp in xpaths:
+        for el in xp(node):
+            price = parse_price(_text(el))
+            if price is not None:
+                return price
+    return None
+
+
+def extract_price_from_html(page_source, xpaths=LEGACY_PRICE_XPATHS):
+    """Price from an HTML fragment (e.g. a card's outerHTML) or a whole page."""
+    return extract_price(parse_html(page_source), xpaths)
+
+
+# ----------------------
+# Search results
+# ----------------------
+def parse_search_cards(page_source):
+    """Return the s-search-result card elements of a search results page."""
+    return _search_cards(parse_html(page_source))
+
+
+def _search_cards(tree):
+    for xp in SEARCH_CARD_XPATHS:
+        cards = xp(tree)
+        if cards:
+            return cards
+    return []
+
+
+def parse_search_card(card):
+    asin = (card.get("data-asin") or "").strip()
+    if not asin or not ASIN_RE.fullmatch(asin):
+        return None
+
+    hrefs = SEARCH_LINK_XPATH(card)
+    if hrefs:
+        product_url = urljoin(AMAZON_BASE, hrefs[0]).split("?")[0]
+    else:
+        product_url = f"{AMAZON_BASE}/dp/{asin}"
+
+    title = _first_text(card, SEARCH_TITLE_XPATHS) or "Unknown"
+    price = extract_price(card, SEARCH_PRICE_XPATHS)
+
+    return {
+        "asin": asin,
+        "title": title,
+        "price": price or "",
+        "currency": "USD",
+        "status": "ok" if price else "no_price",
+        "product_url": product_url,
+    }
+
+
+def parse_search_results(page_source):
+    """
+    Parse every search result card of a page in one pass.
+    Returns the same dicts scraper.scrape_from_search_pages builds.
+    """
+    items, _ = parse_search_page(page_source)
+    return items
+
+
+def parse_last_page(tree):
+    """Highest page number in the pagination bar, or None when there is no bar."""
+    numbers = [int(t) for t in (_text(el) for el in SEARCH_PAGINATION_XPATH(tree)) if t.isdigit()]
+    return max(numbers) if numbers else None
+
+
+def parse_search_page(page_source):
+    """(items, last page number or None) from one parse of a search results page."""
+    tree = parse_html(page_source)
+    results = []
+    for card in _search_cards(tree):
+        item = parse_search_card(card)
+        if item:
+            results.append(item)
+    return results, parse_last_page(tree)
+
+
+# ----------------------
+# Product page
+# ----------------------
+def parse_product_page(page_source, asin):
+    """
+    Parse a /dp/<ASIN> page. Returns None when no title is present,
+    matching scraper.scrape_product_by_asin.
+    """
+    tree = parse_html(page_source)
+    title = _first_text(tree, PRODUCT_TITLE_XPATHS)
+    if not title:
+        return None
+
+    price = extract_price(tree, PRODUCT_PRICE_XPATHS)
+    return {
+        "asin": asin,
+        "title": title,
+        "price": price or "",
+        "currency": "USD",
+        "status": "ok" if price else "no_price",
+        "product_url": f"{AMAZON_BASE}/dp/{asin}",
+    }
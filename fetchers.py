@@ -0,0 +1,261 @@
+import os
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import httpx
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from extractors import is_robot_check, parse_html, SEARCH_CARD_XPATHS, PRODUCT_TITLE_XPATHS
+from metrics import timed
+from driver_profiles import wait_for_content
+from rate_scheduler import scheduler as default_scheduler
+
+logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# ----------------------
+# Config
+# ----------------------
+# "selenium" (default), "http", or "auto" (HTTP first, Selenium when the response is incomplete)
+SCRAPER_FETCHER = os.getenv("SCRAPER_FETCHER", "selenium")
+# Point at a local stub server (benchmarks/stub_server.py) to run offline
+AMAZON_BASE_URL = os.getenv("AMAZON_BASE_URL", "https://www.amazon.com").rstrip("/")
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    html: str
+    status: int = 200
+    source: str = "selenium"
+
+    @property
+    def robot_check(self):
+        return is_robot_check(self.html)
+
+
+def looks_complete(result, kind):
+    """True when the HTML carries what the extractors for `kind` need."""
+    if result.status != 200 or not result.html or result.robot_check:
+        return False
+    tree = parse_html(result.html)
+    xpaths = SEARCH_CARD_XPATHS if kind == "search" else PRODUCT_TITLE_XPATHS
+    return any(xp(tree) for xp in xpaths)
+
+
+# ----------------------
+# Fetcher interface
+# ----------------------
+class Fetcher(ABC):
+    """Every navigation first takes a slot from the shared per-host rate scheduler."""
+
+    name = "base"
+
+    @abstractmethod
+    def fetch(self, url, kind="search"):
+        """Load `url` and return a FetchResult; `kind` ("search"/"product") picks what to wait for."""
+
+    def close(self):
+        pass
+
+
+class HttpFetcher(Fetcher):
+    """
+    Pooled async HTTP client (keep-alive, HTTP/2, gzip) running on its own
+    event loop thread, so synchronous scraper code can share one connection pool.
+    """
+
+    name = "http"
+
+    def __init__(self, timeout=HTTP_TIMEOUT, max_connections=HTTP_MAX_CONNECTIONS, scheduler=default_scheduler):
+        self.scheduler = scheduler
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="http-fetcher", daemon=True)
+        self._thread.start()
+        self._client = self._run(self._make_client(timeout, max_connections))
+
+    async def _make_client(self, timeout, max_connections):
+        return httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+                "Accept-Encoding": "gzip, deflate",
+            },
+        )
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _get(self, url):
+        delay = self.scheduler.reserve(url)
+        if delay > 0:
+            with timed("throttle"):
+                await asyncio.sleep(delay)
+        with timed("page_load"):
+            resp = await self._client.get(url)
+        return FetchResult(url=str(resp.url), html=resp.text, status=resp.status_code, source=self.name)
+
+    def fetch(self, url, kind="search"):
+        return self._run(self._get(url))
+
+    def fetch_many(self, urls):
+        """Fetch several URLs concurrently over the shared pool; order is preserved."""
+        async def gather():
+            return await asyncio.gather(*(self._get(u) for u in urls), return_exceptions=True)
+        return self._run(gather())
+
+    def close(self):
+        try:
+            self._run(self._client.aclose())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class SeleniumFetcher(Fetcher):
+    """Full headless Chrome, borrowed from a DriverPool for each navigation."""
+
+    name = "selenium"
+
+    def __init__(self, pool, wait_time=10, scheduler=default_scheduler):
+        self.pool = pool
+        self.wait_time = wait_time
+        self.scheduler = scheduler
+
+    def fetch(self, url, kind="search"):
+        # Wait for a slot before borrowing, so throttled workers don't sit on a browser
+        self.scheduler.acquire(url)
+        with self.pool.borrow() as driver:
+            with timed("page_load"):
+                driver.get(url)
+            self.pool.record_page(driver)
+
+            html = driver.page_source
+            if not is_robot_check(html):
+                # With the lean profile get() returns at DOMContentLoaded; wait for the element itself
+                if not wait_for_content(driver, kind, self.wait_time):
+                    logger.warning(f"[FETCH] Timeout waiting for {kind} content: {url}")
+                html = driver.page_source
+
+            return FetchResult(url=url, html=html, source=self.name)
+
+    @contextmanager
+    def tab_session(self, tabs):
+        """Borrow one browser and drive `tabs` tabs of it (see TabSession)."""
+        with self.pool.borrow() as driver:
+            session = TabSession(self, driver, tabs)
+            try:
+                yield session
+            finally:
+                session.close()
+
+
+class TabSession:
+    """
+    K tabs of one pooled browser, used as a pipeline: start() points a tab
+    at a URL and returns at once, collect() waits for that tab's page and
+    reads it. While one tab is read and parsed the others keep loading.
+    """
+
+    # Set on the old document before a navigation; the new document won't have it
+    STALE_MARK = "data-scraper-stale"
+
+    def __init__(self, fetcher, driver, tabs):
+        self.fetcher = fetcher
+        self.driver = driver
+        while len(driver.window_handles) < tabs:
+            driver.switch_to.new_window("tab")
+        self.handles = driver.window_handles[:tabs]
+
+    def start(self, handle, url):
+        self.fetcher.scheduler.acquire(url)
+        self.driver.switch_to.window(handle)
+        self.driver.execute_script(
+            "document.documentElement.setAttribute(arguments[1], '1'); window.location.href = arguments[0];",
+            url, self.STALE_MARK,
+        )
+
+    def _loaded(self, driver):
+        return driver.execute_script(
+            "return !document.documentElement.hasAttribute(arguments[0]) && document.readyState !== 'loading';",
+            self.STALE_MARK,
+        )
+
+    def collect(self, handle, url, kind):
+        driver = self.driver
+        driver.switch_to.window(handle)
+        with timed("page_load"):
+            try:
+                WebDriverWait(driver, self.fetcher.wait_time).until(self._loaded)
+            except TimeoutException:
+                logger.warning(f"[FETCH] Timeout loading {url}")
+        self.fetcher.pool.record_page(driver)
+
+        html = driver.page_source
+        if not is_robot_check(html):
+            if not wait_for_content(driver, kind, self.fetcher.wait_time):
+                logger.warning(f"[FETCH] Timeout waiting for {kind} content: {url}")
+            html = driver.page_source
+        return FetchResult(url=url, html=html, source=self.fetcher.name)
+
+    def close(self):
+        """Close the extra tabs so the browser goes back to the pool as it came."""
+        driver = self.driver
+        try:
+            for handle in driver.window_handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(driver.window_handles[0])
+        except Exception as e:
+            # A dead browser fails the pool's health check on checkin and is replaced
+            logger.warning(f"[FETCH] Could not close tabs: {e}")
+
+
+class FallbackFetcher(Fetcher):
+    """HTTP first; re-fetch through the browser when the HTTP page is incomplete or flagged."""
+
+    name = "auto"
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+
+    def fetch(self, url, kind="search"):
+        try:
+            result = self.primary.fetch(url, kind)
+            if looks_complete(result, kind):
+                return result
+            logger.info(f"[FETCH] HTTP response incomplete (status {result.status}), using browser: {url}")
+        except Exception as e:
+            logger.info(f"[FETCH] HTTP fetch failed ({e}), using browser: {url}")
+        return self.fallback.fetch(url, kind)
+
+    def close(self):
+        self.primary.close()
+        self.fallback.close()
+
+
+def build_fetcher(name, pool, wait_time=10):
+    if name == "http":
+        return HttpFetcher()
+    if name == "auto":
+        return FallbackFetcher(HttpFetcher(), SeleniumFetcher(pool, wait_time))
+    if name == "selenium":
+        return SeleniumFetcher(pool, wait_time)
+    raise ValueError(f"Unknown fetcher '{name}' (expected selenium, http or auto)")
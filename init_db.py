@@ -1,8 +1,41 @@
 import asyncio
+from sqlalchemy import inspect, text
 from database import engine, Base
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from models import PriceObservation
+
+
+def add_missing_columns(conn):
+    """create_all() never alters existing tables; add columns introduced later."""
+    columns = {c["name"] for c in inspect(conn).get_columns("amazon_products")}
+    if "created_at" not in columns:
+        # SQLite cannot ADD COLUMN with a non-constant default; inserts set it via the model default
+        conn.execute(text("ALTER TABLE amazon_products ADD COLUMN created_at TIMESTAMP"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_amazon_products_created_at ON amazon_products (created_at)"))
+
+
+def add_missing_indexes(conn):
+    """create_all() skips indexes of tables that already exist; create the ones added later."""
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(PriceObservation.__tablename__)}
+    for index in PriceObservation.__table__.indexes:
+        if index.name not in existing:
+            index.create(conn)
+
+
+def upgrade_schema(conn):
+    """Create missing tables, then the columns and indexes create_all() can't add to existing ones."""
+    Base.metadata.create_all(conn)
+    add_missing_columns(conn)
+    add_missing_indexes(conn)
+
 
 async def create_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(upgrade_schema)
+    finally:
+        await engine.dispose()
+
 
-asyncio.run(create_tables())
+if __name__ == "__main__":
+    asyncio.run(create_tables())
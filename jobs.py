@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from metrics import trace
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "200"))
+# Queued + running jobs accepted before new submissions are refused (HTTP 429)
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "10"))
+JOB_RETRY_AFTER = int(os.getenv("JOB_RETRY_AFTER", "30"))
+SSE_POLL_INTERVAL = float(os.getenv("SSE_POLL_INTERVAL", "0.5"))
+
+TERMINAL_STATES = ("done", "failed", "cancelled")
+
+
+class JobQueueFull(RuntimeError):
+    """The scrape executor is saturated; try again after `retry_after` seconds."""
+
+    def __init__(self, pending, retry_after=JOB_RETRY_AFTER):
+        super().__init__(f"{pending} scrape jobs already queued or running")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+class JobCancelled(Exception):
+    """Raised from a job's progress() callback once the job has been cancelled."""
+
+
+# ----------------------
+# Job
+# ----------------------
+class Job:
+    """One scrape request: status, incremental progress and the final result."""
+
+    def __init__(self, kind, params, pages_total=0, delay=0.0, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.created_at = time.time()
+        self.not_before = self.created_at + delay if delay > 0 else None
+        self.started_at = None
+        self.finished_at = None
+        self.pages_total = pages_total
+        self.pages_done = 0
+        self.items_found = 0
+        self.result = None
+        self.error = None
+        self.version = 0
+        self.cancel_requested = threading.Event()
+        # Resolves (with the job) once it has finished; await via asyncio.wrap_future
+        self.future = Future()
+
+    @property
+    def items_per_second(self):
+        if not self.started_at:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return round(self.items_found / elapsed, 3) if elapsed > 0 else 0.0
+
+    @property
+    def finished(self):
+        return self.status in TERMINAL_STATES
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": {
+                "pages_done": self.pages_done,
+                "pages_total": self.pages_total,
+                "items_found": self.items_found,
+                "items_per_second": self.items_per_second,
+            },
+            "created_at": self.created_at,
+            "not_before": self.not_before,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+# ----------------------
+# Job manager
+# ----------------------
+class JobManager:
+    """
+    The scrape executor: runs every scrape job on a dedicated, fixed-size
+    thread pool, outside the API's event loop and request threadpool. The
+    job function receives a `progress(**fields)` callback and its return
+    value becomes job.result. At most `max_pending` jobs may be queued or
+    running; beyond that submit() raises JobQueueFull (backpressure).
+    """
+
+    def __init__(self, workers=JOB_WORKERS, history=JOB_HISTORY, max_pending=JOB_MAX_PENDING):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job-worker")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.history = history
+        self.max_pending = max_pending
+
+    def pending(self):
+        return sum(1 for j in self._jobs.values() if not j.finished)
+
+    @staticmethod
+    def new_id():
+        return uuid.uuid4().hex
+
+    def submit(self, kind, fn, params, pages_total=0, delay=0.0, force=False, job_id=None):
+        """
+        Queue a job; with `delay` it only starts after that many seconds (e.g. a requeue after a block).
+        Raises JobQueueFull when saturated, unless `force` (follow-up work of an accepted job).
+        `job_id` reuses an id, e.g. when a persisted bulk job is resumed.
+        """
+        job = Job(kind, params, pages_total, delay, job_id)
+        with self._lock:
+            pending = self.pending()
+            if not force and pending >= self.max_pending:
+                raise JobQueueFull(pending)
+            self._jobs[job.id] = job
+            self._trim()
+        if delay > 0:
+            timer = threading.Timer(delay, self._pool.submit, (self._run, job, fn))
+            timer.daemon = True
+            timer.start()
+            logger.info(f"[JOB] Scheduled {kind} job {job.id} in {delay:.0f}s {params}")
+        else:
+            self._pool.submit(self._run, job, fn)
+            logger.info(f"[JOB] Queued {kind} job {job.id} {params}")
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id, reason="cancelled"):
+        """
+        Stop a job: a queued one never starts, a running one stops at its next
+        progress() call. Returns False when there is no such unfinished job.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.error = reason
+        job.cancel_requested.set()
+        logger.info(f"[JOB] Cancelling {job.id}: {reason}")
+        return True
+
+    def list(self, limit=50):
+        with self._lock:
+            return list(self._jobs.values())[-limit:][::-1]
+
+    def _trim(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in finished[: max(0, len(finished) - self.history)]:
+            self._jobs.pop(job.id, None)
+
+    def _update(self, job, **fields):
+        for key, value in fields.items():
+            setattr(job, key, value)
+        job.version += 1
+
+    def _run(self, job, fn):
+        self._update(job, status="running", started_at=time.time())
+
+        def progress(**fields):
+            self._update(job, **fields)
+            if job.cancel_requested.is_set():
+                raise JobCancelled(job.error)
+
+        try:
+            if job.cancel_requested.is_set():
+                raise JobCancelled(job.error)
+            # The job id doubles as the trace id for every log line of the run
+            with trace(job.id):
+                result = fn(progress)
+            self._update(job, status="done", result=result, finished_at=time.time())
+            logger.info(f"[JOB] {job.id} done")
+        except JobCancelled:
+            self._update(job, status="cancelled", finished_at=time.time())
+            logger.info(f"[JOB] {job.id} cancelled")
+        except Exception as e:
+            self._update(job, status="failed", error=str(e), finished_at=time.time())
+            logger.error(f"[JOB] {job.id} failed: {e}")
+        finally:
+            job.future.set_result(job)
+
+    async def events(self, job_id):
+        """Server-Sent Events stream: a `progress` event per change, then one `end` event."""
+        job = self.get(job_id)
+        seen = -1
+        while job is not None:
+            if job.version != seen:
+                seen = job.version
+                event = "end" if job.finished else "progress"
+                yield f"event: {event}\ndata: {json.dumps(job.to_dict())}\n\n"
+                if job.finished:
+                    return
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queued": sum(1 for j in jobs if j.status == "queued"),
+            "running": sum(1 for j in jobs if j.status == "running"),
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+job_manager = JobManager()
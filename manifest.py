@@ -0,0 +1,311 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import select, update, func, bindparam
+
+from models import BulkJob, BulkJobItem
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+MANIFEST_BATCH_SIZE = int(os.getenv("MANIFEST_BATCH_SIZE", "200"))       # state changes per UPDATE batch
+MANIFEST_FLUSH_INTERVAL = float(os.getenv("MANIFEST_FLUSH_INTERVAL", "5.0"))
+MANIFEST_CHUNK = int(os.getenv("MANIFEST_CHUNK", "1000"))                # ASINs pulled per work chunk
+MANIFEST_MAX_ATTEMPTS = int(os.getenv("MANIFEST_MAX_ATTEMPTS", "3"))     # retries stop after this many tries
+MANIFEST_POLL_INTERVAL = 0.5  # seconds a job waits for more ASINs while the upload is still arriving
+# Resume jobs left running by a previous process when the API starts
+MANIFEST_RESUME = os.getenv("MANIFEST_RESUME", "1") == "1"
+
+OPEN_STATES = ("pending", "in_flight")
+ITEMS = BulkJobItem.__table__
+JOBS = BulkJob.__table__
+
+
+class JobManifest:
+    """
+    Durable per-ASIN state for one bulk job (tables bulk_jobs / bulk_job_items).
+
+            pending -> in_flight -> done
+                             -> failed   (retry_failed() puts these back to pending)
+                             -> pending  (blocked; picked up again on resume, attempt refunded)
+
+    State changes are buffered and written as one executemany UPDATE per
+    `batch_size` changes or `flush_interval` seconds. On restart anything
+    still pending or in_flight is simply scraped again, so a job resumes
+    where it stopped, losing at most the last unflushed batch of marks.
+    A job created from a streaming upload is "receiving" until the upload
+    ends; it already runs while ASINs are still being appended.
+    """
+
+    def __init__(self, session_factory, job_id, batch_size=MANIFEST_BATCH_SIZE,
+                 flush_interval=MANIFEST_FLUSH_INTERVAL):
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    # ---- creation ----
+    @classmethod
+    def create(cls, session_factory, job_id, asins, kind="csv", params=None, chunk=MANIFEST_CHUNK):
+        """Record a new job and its ASINs (all pending); `asins` may be any iterable of unique ASINs."""
+        manifest = cls.begin(session_factory, job_id, kind, params, status="running")
+        rows = []
+        for asin in asins:
+            rows.append(asin)
+            if len(rows) >= chunk:
+                manifest.append(rows)
+                rows = []
+        if rows:
+            manifest.append(rows)
+        return manifest
+
+    @classmethod
+    def begin(cls, session_factory, job_id, kind="csv", params=None, status="receiving"):
+        """
+        Record a new, empty job. While its status is "receiving", ASINs can
+        still be appended and iter_open() waits for them instead of finishing.
+        """
+        db = session_factory()
+        try:
+            db.execute(JOBS.insert().values(
+                id=job_id, kind=kind, status=status, params=json.dumps(params or {}), total=0,
+            ))
+            db.commit()
+        finally:
+            db.close()
+        return cls(session_factory, job_id)
+
+    def append(self, asins):
+        """Add unique ASINs (not yet in this job) as pending, in one transaction."""
+        if not asins:
+            return 0
+        db = self.session_factory()
+        try:
+            db.execute(ITEMS.insert(), [
+                {"job_id": self.job_id, "asin": asin, "state": "pending", "attempts": 0} for asin in asins
+            ])
+            db.execute(JOBS.update().where(JOBS.c.id == self.job_id)
+                       .values(total=JOBS.c.total + len(asins), updated_at=datetime.utcnow()))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return len(asins)
+
+    def finish_receiving(self):
+        """The upload is complete: the job finishes once its open ASINs are worked off."""
+        db = self.session_factory()
+        try:
+            db.execute(JOBS.update().where(JOBS.c.id == self.job_id, JOBS.c.status == "receiving")
+                       .values(status="running", updated_at=datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+
+    def status(self):
+        db = self.session_factory()
+        try:
+            return db.execute(select(JOBS.c.status).where(JOBS.c.id == self.job_id)).scalar()
+        finally:
+            db.close()
+
+    # ---- state changes (buffered) ----
+    def mark(self, asin, state, error=None):
+        with self._lock:
+            self._buffer.append({
+                "b_asin": asin,
+                "b_state": state,
+                # Blocked ASINs go back to pending without using up an attempt
+                "b_inc": {"in_flight": 1, "pending": -1}.get(state, 0),
+                "b_error": str(error)[:255] if error else None,
+            })
+            due = (len(self._buffer) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def mark_many(self, asins, state, error=None):
+        for asin in asins:
+            self.mark(asin, state, error)
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if not rows:
+            return 0
+        stmt = (
+            update(ITEMS)
+            .where(ITEMS.c.job_id == self.job_id, ITEMS.c.asin == bindparam("b_asin"))
+            .values(
+                state=bindparam("b_state"),
+                attempts=ITEMS.c.attempts + bindparam("b_inc"),
+                error=bindparam("b_error"),
+                updated_at=datetime.utcnow(),
+            )
+        )
+        db = self.session_factory()
+        try:
+            db.connection().execute(stmt, rows)
+            db.execute(JOBS.update().where(JOBS.c.id == self.job_id).values(updated_at=datetime.utcnow()))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"[MANIFEST] Could not write {len(rows)} state changes for {self.job_id}: {e}")
+            # Keep them for the next flush rather than losing progress
+            with self._lock:
+                self._buffer = rows + self._buffer
+            return 0
+        finally:
+            db.close()
+        return len(rows)
+
+    # ---- reads ----
+    def iter_open(self, chunk=MANIFEST_CHUNK, max_attempts=MANIFEST_MAX_ATTEMPTS):
+        """
+        Yield lists of ASINs still pending or in flight, in ASIN order (keyset
+        paginated), in a single pass. While the job is still receiving its
+        upload, the pass is repeated (after MANIFEST_POLL_INTERVAL) since new
+        rows may sort anywhere; the pass that starts after the upload ended is
+        the last. Repeat passes only pick up pending ASINs: in_flight ones
+        were handed out by an earlier pass. ASINs already tried `max_attempts`
+        times are failed, not yielded.
+        """
+        states = OPEN_STATES
+        while True:
+            receiving = self.status() == "receiving"
+            self.expire_attempts(max_attempts)
+            last = ""
+            while True:
+                self.flush()
+                db = self.session_factory()
+                try:
+                    asins = db.execute(
+                        select(ITEMS.c.asin)
+                        .where(ITEMS.c.job_id == self.job_id, ITEMS.c.state.in_(states),
+                               ITEMS.c.attempts < max_attempts, ITEMS.c.asin > last)
+                        .order_by(ITEMS.c.asin)
+                        .limit(chunk)
+                    ).scalars().all()
+                finally:
+                    db.close()
+                if not asins:
+                    break
+                last = asins[-1]
+                yield asins
+            if not receiving:
+                return
+            states = ("pending",)
+            time.sleep(MANIFEST_POLL_INTERVAL)
+
+    def expire_attempts(self, max_attempts=MANIFEST_MAX_ATTEMPTS):
+        """Fail open ASINs that used up their `max_attempts` tries; returns how many."""
+        self.flush()
+        db = self.session_factory()
+        try:
+            result = db.execute(
+                ITEMS.update()
+                .where(ITEMS.c.job_id == self.job_id, ITEMS.c.state.in_(OPEN_STATES),
+                       ITEMS.c.attempts >= max_attempts)
+                .values(state="failed", error=f"gave up after {max_attempts} attempts",
+                        updated_at=datetime.utcnow())
+            )
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+    def counts(self):
+        self.flush()
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(ITEMS.c.state, func.count())
+                .where(ITEMS.c.job_id == self.job_id)
+                .group_by(ITEMS.c.state)
+            ).all()
+        finally:
+            db.close()
+        counts = {"pending": 0, "in_flight": 0, "done": 0, "failed": 0}
+        counts.update({state: n for state, n in rows})
+        return counts
+
+    def failed(self, limit=100):
+        db = self.session_factory()
+        try:
+            return [
+                {"asin": asin, "attempts": attempts, "error": error}
+                for asin, attempts, error in db.execute(
+                    select(ITEMS.c.asin, ITEMS.c.attempts, ITEMS.c.error)
+                    .where(ITEMS.c.job_id == self.job_id, ITEMS.c.state == "failed")
+                    .order_by(ITEMS.c.asin)
+                    .limit(limit)
+                )
+            ]
+        finally:
+            db.close()
+
+    # ---- job level ----
+    def set_status(self, status):
+        self.flush()
+        db = self.session_factory()
+        try:
+            db.execute(JOBS.update().where(JOBS.c.id == self.job_id)
+                       .values(status=status, updated_at=datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+
+    def retry_failed(self, max_attempts=MANIFEST_MAX_ATTEMPTS):
+        """Put failed ASINs with attempts left back to pending; returns how many."""
+        self.flush()
+        db = self.session_factory()
+        try:
+            result = db.execute(
+                ITEMS.update()
+                .where(ITEMS.c.job_id == self.job_id, ITEMS.c.state == "failed",
+                       ITEMS.c.attempts < max_attempts)
+                .values(state="pending", error=None)
+            )
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+
+def get_job(session_factory, job_id):
+    """The bulk_jobs row as a dict (params decoded), or None."""
+    db = session_factory()
+    try:
+        row = db.execute(select(JOBS).where(JOBS.c.id == job_id)).mappings().first()
+    finally:
+        db.close()
+    if row is None:
+        return None
+    return {**row, "params": json.loads(row["params"] or "{}")}
+
+
+def unfinished_jobs(session_factory):
+    """
+    Jobs left running or receiving by a previous process (crash, redeploy) -
+    candidates for resume. A receiving job's upload died with that process.
+    """
+    db = session_factory()
+    try:
+        rows = db.execute(
+            select(JOBS).where(JOBS.c.status.in_(("receiving", "running"))).order_by(JOBS.c.created_at)
+        ).mappings().all()
+    finally:
+        db.close()
+    return [{**r, "params": json.loads(r["params"] or "{}")} for r in rows]
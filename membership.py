@@ -0,0 +1,47 @@
+import os
+
+from sqlalchemy import select
+
+from models import AmazonProduct
+
+# ----------------------
+# Config
+# ----------------------
+# ASINs per IN (...) query; stays under SQLite's 999 bind-parameter ceiling
+MEMBERSHIP_CHUNK = int(os.getenv("MEMBERSHIP_CHUNK", "900"))
+
+
+def membership_query(asins):
+    """SELECT the ASINs of `asins` that have a row in amazon_products (unique index lookup)."""
+    return select(AmazonProduct.asin).where(AmazonProduct.asin.in_(list(asins)))
+
+
+def _chunks(asins, size):
+    for i in range(0, len(asins), size):
+        yield asins[i:i + size]
+
+
+def _split(asins, existing):
+    return [a for a in asins if a not in existing], existing
+
+
+def split_known(session, asins, chunk=MEMBERSHIP_CHUNK):
+    """
+    Resolve a batch of ASINs against amazon_products in chunked IN queries.
+    Returns (new, existing): unknown ASINs in input order (deduplicated) and
+    the set already stored. Works with a Session or a Connection.
+    """
+    unique = list(dict.fromkeys(asins))
+    existing = set()
+    for part in _chunks(unique, chunk):
+        existing.update(session.execute(membership_query(part)).scalars())
+    return _split(unique, existing)
+
+
+async def split_known_async(session, asins, chunk=MEMBERSHIP_CHUNK):
+    """split_known for an AsyncSession or AsyncConnection."""
+    unique = list(dict.fromkeys(asins))
+    existing = set()
+    for part in _chunks(unique, chunk):
+        existing.update((await session.execute(membership_query(part))).scalars())
+    return _split(unique, existing)
@@ -0,0 +1,117 @@
+"""
+Prometheus metrics and per-run trace ids.
+
+    with timed("page_load"):
+        driver.get(url)
+
+Every stage of a scrape is observed in the `scraper_stage_seconds`
+histogram under one of the stage labels driver_start, throttle,
+breaker_wait, page_load, wait, extract and db_commit. Time spent waiting
+for the rate scheduler is `throttle`; there is no separate sleep stage.
+Counters cover pages, items, robot checks and DB errors. backend_api
+serves them on GET /metrics. Log records carry the active trace id (job
+id, request id or a fresh id per scrape) through the `trace_id` attribute.
+"""
+import time
+import uuid
+import logging
+import functools
+import contextvars
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Metrics
+# ----------------------
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "scraper_stage_seconds", "Time spent per scrape stage",
+    ["stage"], buckets=STAGE_BUCKETS,
+)
+PAGES = Counter("scraper_pages_total", "Pages fetched", ["kind", "source"])
+ITEMS = Counter("scraper_items_total", "Items extracted", ["kind"])
+ROBOT_CHECKS = Counter("scraper_robot_checks_total", "Robot check / block pages seen", ["kind"])
+BREAKER_TRIPS = Counter("scraper_breaker_trips_total", "Circuit breaker trips", ["host"])
+DB_ROWS = Counter("scraper_db_rows_total", "Rows written by the batch writer", ["result"])
+DB_ERRORS = Counter("scraper_db_errors_total", "Failed database writes", ["operation"])
+RETENTION_ROWS = Counter("retention_deleted_rows_total", "Rows deleted by the retention engine", ["table"])
+RETENTION_SECONDS = Histogram(
+    "retention_pass_seconds", "Time spent applying a retention policy",
+    ["table"], buckets=STAGE_BUCKETS,
+)
+API_REQUEST_SECONDS = Histogram(
+    "api_request_seconds", "FastAPI request latency",
+    ["method", "route", "status"],
+)
+
+
+@contextmanager
+def timed(stage):
+    """Observe the duration of the block in scraper_stage_seconds{stage=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        logger.debug(f"[TIMING] {stage} {elapsed * 1000:.1f} ms")
+
+
+def render():
+    """(body, content type) for the /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# ----------------------
+# Trace ids
+# ----------------------
+trace_id_var = contextvars.ContextVar("trace_id", default=None)
+
+
+def current_trace_id():
+    return trace_id_var.get()
+
+
+@contextmanager
+def trace(trace_id=None):
+    """
+    Run the block under `trace_id`. Without one, an already active trace is
+    kept and otherwise a new id is generated. Yields the effective id.
+    """
+    if trace_id is None and trace_id_var.get():
+        yield trace_id_var.get()
+        return
+    token = trace_id_var.set(trace_id or uuid.uuid4().hex[:16])
+    try:
+        yield trace_id_var.get()
+    finally:
+        trace_id_var.reset(token)
+
+
+def traced(fn):
+    """Decorator: run fn inside trace() so its log lines share one id."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with trace():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds `record.trace_id` ("-" outside a trace) for use in log formats."""
+
+    def filter(self, record):
+        record.trace_id = trace_id_var.get() or "-"
+        return True
+
+
+def install_trace_filter(logger_=None):
+    """Attach TraceIdFilter to every handler of `logger_` (root by default)."""
+    target = logger_ or logging.getLogger()
+    for handler in target.handlers:
+        if not any(isinstance(f, TraceIdFilter) for f in handler.filters):
+            handler.addFilter(TraceIdFilter())
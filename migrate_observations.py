@@ -0,0 +1,117 @@
+"""
+Create price_observations and backfill it from amazon_products and data/prices.csv.
+
+    python migrate_observations.py [--prices-csv data/prices.csv] [--batch 5000]
+
+Each source is tagged with its own run_id, so re-running the script is a no-op.
+"""
+import os
+import csv
+import asyncio
+import argparse
+from datetime import datetime
+
+from sqlalchemy import select
+
+from database import engine
+from init_db import upgrade_schema
+from models import AmazonProduct, PriceObservation
+from observations import to_observation
+
+PRODUCTS_RUN_ID = "backfill:amazon_products"
+PRICES_CSV_RUN_ID = "backfill:prices.csv"
+DEFAULT_PRICES_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "prices.csv")
+
+
+async def already_backfilled(conn, run_id):
+    stmt = select(PriceObservation.id).where(PriceObservation.run_id == run_id).limit(1)
+    return (await conn.execute(stmt)).first() is not None
+
+
+async def insert_batch(conn, rows):
+    if rows:
+        await conn.execute(PriceObservation.__table__.insert(), rows)
+    return len(rows)
+
+
+async def backfill_products(batch):
+    """Keyset-walk amazon_products by id so memory stays bounded."""
+    total, last_id = 0, 0
+    async with engine.begin() as conn:
+        if await already_backfilled(conn, PRODUCTS_RUN_ID):
+            print("[backfill] amazon_products already imported, skipping")
+            return 0
+
+        while True:
+            stmt = (
+                select(AmazonProduct)
+                .where(AmazonProduct.id > last_id)
+                .order_by(AmazonProduct.id)
+                .limit(batch)
+            )
+            products = (await conn.execute(stmt)).all()
+            if not products:
+                break
+            last_id = products[-1].id
+            total += await insert_batch(conn, [
+                to_observation(p._mapping, PRODUCTS_RUN_ID, p.created_at or datetime.utcnow())
+                for p in products
+            ])
+            print(f"[backfill] amazon_products: {total} rows")
+    return total
+
+
+def read_prices_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for rec in csv.DictReader(f):
+            sku = (rec.get("sku") or "").strip()
+            if not sku:
+                continue
+            try:
+                scraped_at = datetime.strptime(rec.get("date", ""), "%Y-%m-%d")
+            except ValueError:
+                scraped_at = datetime.utcnow()
+            yield to_observation(
+                {"asin": sku, "price": rec.get("price"), "currency": rec.get("currency"), "status": rec.get("status")},
+                PRICES_CSV_RUN_ID,
+                scraped_at,
+            )
+
+
+async def backfill_prices_csv(path, batch):
+    if not os.path.exists(path):
+        print(f"[backfill] {path} not found, skipping")
+        return 0
+
+    total = 0
+    async with engine.begin() as conn:
+        if await already_backfilled(conn, PRICES_CSV_RUN_ID):
+            print("[backfill] prices.csv already imported, skipping")
+            return 0
+
+        rows = []
+        for row in read_prices_csv(path):
+            rows.append(row)
+            if len(rows) >= batch:
+                total += await insert_batch(conn, rows)
+                rows = []
+        total += await insert_batch(conn, rows)
+    print(f"[backfill] prices.csv: {total} rows")
+    return total
+
+
+async def main(prices_csv, batch):
+    async with engine.begin() as conn:
+        # amazon_products may predate created_at; the backfill selects every column
+        await conn.run_sync(upgrade_schema)
+    await backfill_products(batch)
+    await backfill_prices_csv(prices_csv, batch)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and backfill price_observations")
+    parser.add_argument("--prices-csv", default=DEFAULT_PRICES_CSV)
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.prices_csv, args.batch))
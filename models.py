@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index, Text, func
 from database import Base
 
 class AmazonProduct(Base):
@@ -11,4 +13,87 @@ class AmazonProduct(Base):
     currency = Column(String, nullable=True)
     status = Column(String, nullable=True)
     product_url = Column(String, nullable=True)
-    
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=True, index=True)
+
+
+class PriceObservation(Base):
+    """Append-only price history: one row per ASIN per scrape."""
+    __tablename__ = "price_observations"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    asin = Column(String(10), nullable=False)
+    price_cents = Column(Integer, nullable=True)
+    currency = Column(String(3), nullable=False, default="USD")
+    status = Column(String(16), nullable=True)
+    # Set in Python so the stored value keeps its microseconds: SQLite's
+    # CURRENT_TIMESTAMP is whole seconds, which breaks the /prices keyset cursor
+    scraped_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
+    run_id = Column(String(32), nullable=True, index=True)
+
+    __table_args__ = (
+        # "latest price for an ASIN" and "history for an ASIN" are index range scans;
+        # on Postgres the INCLUDE columns make them index-only.
+        Index(
+            "ix_price_observations_asin_scraped_at",
+            "asin", "scraped_at",
+            postgresql_include=["price_cents", "currency"],
+        ),
+        # GET /prices pages newest-first across all ASINs by (scraped_at, id)
+        Index("ix_price_observations_scraped_at_id", "scraped_at", "id"),
+    )
+
+
+class BulkJob(Base):
+    """Persistent record of a bulk ASIN job, so it can resume after a restart."""
+    __tablename__ = "bulk_jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(16), nullable=False, default="csv")
+    status = Column(String(16), nullable=False, default="running", index=True)
+    params = Column(Text, nullable=True)  # JSON
+    total = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())
+
+
+class BulkJobItem(Base):
+    """Per-ASIN state of a bulk job: pending -> in_flight -> done | failed."""
+    __tablename__ = "bulk_job_items"
+
+    job_id = Column(String(32), primary_key=True)
+    asin = Column(String(10), primary_key=True)
+    state = Column(String(10), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(String(255), nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_bulk_job_items_job_state", "job_id", "state", "asin"),
+    )
+
+
+class WorkItem(Base):
+    """
+    Shared work queue: one page or ASIN, claimed by a worker node under a lease.
+    queued -> leased -> done | failed; an expired lease makes it claimable again.
+    """
+    __tablename__ = "work_items"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    job_id = Column(String(32), nullable=False)
+    kind = Column(String(8), nullable=False)        # "asin" | "page"
+    payload = Column(String(255), nullable=False)   # the ASIN, or JSON for a search page
+    state = Column(String(8), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())
+    lease_owner = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    result = Column(Text, nullable=True)            # JSON
+    error = Column(String(255), nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("uq_work_items_job_payload", "job_id", "payload", unique=True),
+        # claim scan: next available queued items in FIFO order
+        Index("ix_work_items_state_available", "state", "available_at", "id"),
+    )
@@ -0,0 +1,70 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func
+
+from models import PriceObservation
+
+
+def new_run_id():
+    return uuid.uuid4().hex
+
+
+def price_to_cents(price):
+    """19.99 / "19.99" / "$1,299.00" -> integer cents; None when there is no price."""
+    if price in (None, ""):
+        return None
+    try:
+        return int(round(float(str(price).replace("$", "").replace(",", "")) * 100))
+    except ValueError:
+        return None
+
+
+def to_observation(item, run_id=None, scraped_at=None):
+    """price_observations row for a scraped item, stamped now (UTC) unless given a time."""
+    return {
+        "asin": item["asin"],
+        "price_cents": price_to_cents(item.get("price")),
+        "currency": (item.get("currency") or "USD")[:3],
+        "status": item.get("status") or "ok",
+        "scraped_at": scraped_at or item.get("scraped_at") or datetime.utcnow(),
+        "run_id": item.get("run_id") or run_id,
+    }
+
+
+# ----------------------
+# Queries (all served by ix_price_observations_asin_scraped_at)
+# ----------------------
+def latest_price(session, asin):
+    stmt = (
+        select(PriceObservation)
+        .where(PriceObservation.asin == asin)
+        .order_by(PriceObservation.scraped_at.desc())
+        .limit(1)
+    )
+    return session.execute(stmt).scalars().first()
+
+
+def latest_prices(session, asins):
+    """Latest observation for each ASIN in `asins`: one index seek per ASIN."""
+    latest = (
+        select(PriceObservation.asin, func.max(PriceObservation.scraped_at).label("scraped_at"))
+        .where(PriceObservation.asin.in_(list(asins)))
+        .group_by(PriceObservation.asin)
+        .subquery()
+    )
+    stmt = select(PriceObservation).join(
+        latest,
+        (PriceObservation.asin == latest.c.asin) & (PriceObservation.scraped_at == latest.c.scraped_at),
+    )
+    return {obs.asin: obs for obs in session.execute(stmt).scalars()}
+
+
+def price_history(session, asin, days=30, now=None):
+    since = (now or datetime.utcnow()) - timedelta(days=days)
+    stmt = (
+        select(PriceObservation)
+        .where(PriceObservation.asin == asin, PriceObservation.scraped_at >= since)
+        .order_by(PriceObservation.scraped_at)
+    )
+    return session.execute(stmt).scalars().all()
@@ -0,0 +1,124 @@
+import os
+import json
+import base64
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import select, or_, and_
+
+from models import PriceObservation
+
+# ----------------------
+# Config
+# ----------------------
+PRICES_PAGE_SIZE = int(os.getenv("PRICES_PAGE_SIZE", "100"))
+PRICES_MAX_PAGE_SIZE = int(os.getenv("PRICES_MAX_PAGE_SIZE", "1000"))
+
+# Selectable fields; "price" is derived from price_cents
+PRICE_FIELDS = {
+    "id": PriceObservation.id,
+    "asin": PriceObservation.asin,
+    "price": PriceObservation.price_cents,
+    "price_cents": PriceObservation.price_cents,
+    "currency": PriceObservation.currency,
+    "status": PriceObservation.status,
+    "scraped_at": PriceObservation.scraped_at,
+    "run_id": PriceObservation.run_id,
+}
+DEFAULT_FIELDS = ["asin", "price", "currency", "status", "scraped_at"]
+
+
+class InvalidQuery(ValueError):
+    """Unknown field or a cursor that was not issued by this API."""
+
+
+# ----------------------
+# Cursor
+# ----------------------
+def encode_cursor(scraped_at, row_id):
+    raw = json.dumps([scraped_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        scraped_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(scraped_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidQuery(f"Invalid cursor: {e}")
+
+
+def parse_fields(fields):
+    """'asin,price' -> ['asin', 'price'] (validated); None -> DEFAULT_FIELDS."""
+    if not fields:
+        return list(DEFAULT_FIELDS)
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in names if f not in PRICE_FIELDS]
+    if unknown:
+        raise InvalidQuery(f"Unknown fields {unknown}; choose from {sorted(PRICE_FIELDS)}")
+    return names
+
+
+# ----------------------
+# Query
+# ----------------------
+def prices_query(fields, asins=None, status=None, min_price=None, max_price=None,
+                 start=None, end=None, cursor=None, limit=PRICES_PAGE_SIZE):
+    """
+    SELECT one page of price_observations, newest first, ordered by
+    (scraped_at, id) so the cursor is a plain keyset seek: no OFFSET, and
+    page N costs the same as page 1. With `asins` the ASIN + scraped_at index
+    serves it, otherwise the scraped_at index. Fetches limit + 1 rows to
+    know whether another page follows.
+    """
+    columns = {PRICE_FIELDS[f] for f in fields} | {PriceObservation.id, PriceObservation.scraped_at}
+    stmt = (
+        select(*sorted(columns, key=lambda c: c.name))
+        .order_by(PriceObservation.scraped_at.desc(), PriceObservation.id.desc())
+        .limit(limit + 1)
+    )
+    if asins:
+        stmt = stmt.where(PriceObservation.asin.in_(asins))
+    if status:
+        stmt = stmt.where(PriceObservation.status == status)
+    if min_price is not None:
+        stmt = stmt.where(PriceObservation.price_cents >= round(min_price * 100))
+    if max_price is not None:
+        stmt = stmt.where(PriceObservation.price_cents <= round(max_price * 100))
+    if start:
+        stmt = stmt.where(PriceObservation.scraped_at >= start)
+    if end:
+        stmt = stmt.where(PriceObservation.scraped_at < end)
+    if cursor:
+        at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            PriceObservation.scraped_at < at,
+            and_(PriceObservation.scraped_at == at, PriceObservation.id < row_id),
+        ))
+    return stmt
+
+
+def _value(field, row):
+    value = row[PRICE_FIELDS[field].name]
+    if field == "price":
+        return None if value is None else value / 100
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def fetch_prices(session, fields, limit=PRICES_PAGE_SIZE, **filters):
+    """One page as {"items": [...], "next_cursor": str | None} with only `fields` per item."""
+    rows = session.execute(prices_query(fields, limit=limit, **filters)).mappings().all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [{f: _value(f, row) for f in fields} for row in rows],
+        "next_cursor": encode_cursor(rows[-1]["scraped_at"], rows[-1]["id"]) if more else None,
+    }
+
+
+def page_etag(body):
+    """Strong ETag for a serialized response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
@@ -0,0 +1,97 @@
+import os
+import time
+import random
+import logging
+import threading
+from urllib.parse import urlparse
+
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+# Politeness budget: sustained navigations per second per host (0 disables throttling)
+HOST_RATE_PER_SEC = float(os.getenv("HOST_RATE_PER_SEC", "1.0"))
+# Navigations that may go out back-to-back after an idle period
+HOST_BURST = int(os.getenv("HOST_BURST", "1"))
+# Random extra delay, as a fraction of the 1/rate interval, so requests don't tick like a metronome
+RATE_JITTER = float(os.getenv("RATE_JITTER", "0.5"))
+
+
+class TokenBucket:
+    """Classic token bucket; `reserve()` returns how long the caller must wait for its token."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # Tokens may go negative: later callers queue up behind earlier reservations
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateScheduler:
+    """
+    Per-host token buckets shared by every worker thread in the process.
+    Call `acquire(url)` right before a network navigation (async code awaits
+    `reserve(url)` seconds instead); local parsing is never throttled, so the
+    rate alone sets overall throughput.
+    """
+
+    def __init__(self, rate=HOST_RATE_PER_SEC, burst=HOST_BURST, jitter=RATE_JITTER):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "waited": 0, "wait_seconds": 0.0}
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def reserve(self, url_or_host):
+        """Take one navigation slot for the host; returns the seconds to wait before using it."""
+        if not self.enabled:
+            return 0.0
+        host = urlparse(url_or_host).netloc or url_or_host
+
+        with self._lock:
+            delay = self._bucket(host).reserve()
+            if delay > 0 and self.jitter > 0:
+                delay += random.uniform(0, self.jitter / self.rate)
+            self.stats["acquired"] += 1
+            if delay > 0:
+                self.stats["waited"] += 1
+                self.stats["wait_seconds"] += delay
+        return delay
+
+    def acquire(self, url_or_host):
+        """Block until the host has budget for one more navigation; returns the seconds waited."""
+        delay = self.reserve(url_or_host)
+        if delay > 0:
+            with timed("throttle"):
+                time.sleep(delay)
+        return delay
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "rate_per_sec": self.rate, "burst": self.burst, "hosts": len(self._buckets)}
+
+
+# Process-wide scheduler used by the fetchers and the legacy CLI scraper
+scheduler = RateScheduler()
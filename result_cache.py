@@ -0,0 +1,135 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from models import AmazonProduct
+from observations import latest_prices
+from membership import split_known
+
+# ----------------------
+# Config
+# ----------------------
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", str(24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "50000"))
+CACHE_DB_CHUNK = 500
+
+
+class ResultCache:
+    """
+    Freshness-aware cache of scraped items keyed by ASIN.
+
+    Layer 1: in-process LRU (bounded, oldest evicted first).
+    Layer 2: the database - the latest price_observations row per ASIN.
+    An entry is fresh when it was scraped less than `max_age` seconds ago
+    (default CACHE_TTL_SECONDS); only stale or unknown ASINs need a scrape.
+    """
+
+    def __init__(self, session_factory, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"lru_hits": 0, "db_hits": 0, "misses": 0, "evictions": 0}
+
+    # ---- LRU layer ----
+    def _lru_get(self, asin, max_age):
+        entry = self._lru.get(asin)
+        if entry is None:
+            return None
+        fetched_at, item = entry
+        if time.time() - fetched_at > max_age:
+            return None
+        self._lru.move_to_end(asin)
+        return item
+
+    def put(self, item, fetched_at=None):
+        with self._lock:
+            self._lru[item["asin"]] = (fetched_at or time.time(), item)
+            self._lru.move_to_end(item["asin"])
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    # ---- DB layer ----
+    def _db_lookup(self, asins, max_age):
+        """Fresh items for `asins` from the newest observations, in IN(...) chunks."""
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+        found = {}
+        db = self.session_factory()
+        try:
+            for i in range(0, len(asins), CACHE_DB_CHUNK):
+                # Cheap index-only membership pass first: never-seen ASINs skip the observation query
+                _, known = split_known(db, asins[i:i + CACHE_DB_CHUNK])
+                if not known:
+                    continue
+                fresh = {a: o for a, o in latest_prices(db, known).items() if o.scraped_at >= cutoff}
+                if not fresh:
+                    continue
+                products = {
+                    p.asin: p for p in db.execute(
+                        select(AmazonProduct).where(AmazonProduct.asin.in_(list(fresh)))
+                    ).scalars()
+                }
+                for asin, obs in fresh.items():
+                    product = products.get(asin)
+                    found[asin] = ({
+                        "asin": asin,
+                        "title": product.title if product else "Unknown",
+                        "price": obs.price_cents / 100 if obs.price_cents is not None else "",
+                        "currency": obs.currency,
+                        "status": obs.status or "ok",
+                        "product_url": product.product_url if product else f"https://www.amazon.com/dp/{asin}",
+                    }, obs.scraped_at)
+        finally:
+            db.close()
+        return found
+
+    # ---- public API ----
+    def partition(self, asins, max_age=None):
+        """Split ASINs into ({asin: cached item} fresh, [asin] stale-or-unknown)."""
+        max_age = self.ttl if max_age is None else max_age
+        fresh, missing = {}, []
+        with self._lock:
+            for asin in asins:
+                item = self._lru_get(asin, max_age)
+                if item is not None:
+                    fresh[asin] = item
+                    self.stats["lru_hits"] += 1
+                else:
+                    missing.append(asin)
+
+        stale = []
+        if missing and max_age > 0:
+            from_db = self._db_lookup(missing, max_age)
+            for asin in missing:
+                if asin in from_db:
+                    item, scraped_at = from_db[asin]
+                    fresh[asin] = item
+                    self.put(item, fetched_at=time.time() - (datetime.utcnow() - scraped_at).total_seconds())
+                    self.stats["db_hits"] += 1
+                else:
+                    stale.append(asin)
+        else:
+            stale = missing
+
+        self.stats["misses"] += len(stale)
+        return fresh, stale
+
+    def get(self, asin, max_age=None):
+        fresh, _ = self.partition([asin], max_age)
+        return fresh.get(asin)
+
+    def snapshot(self):
+        hits = self.stats["lru_hits"] + self.stats["db_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._lru),
+            "ttl_seconds": self.ttl,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+        }
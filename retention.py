@@ -0,0 +1,203 @@
+"""
+Data retention: periodically deletes rows past their table's maximum age.
+
+    python retention.py [--dry-run]          # one pass over every policy, then exit
+
+Rows are deleted oldest first in batches of RETENTION_BATCH_SIZE, selected
+through the table's timestamp index, one short transaction per batch, so
+the table is never locked for the whole cleanup. With RETENTION_ARCHIVE_DIR
+set, every batch is first appended to a gzipped JSON-lines file per table and
+pass. backend_api runs a pass every RETENTION_INTERVAL seconds on a
+background thread and reports the last pass on GET /retention.
+"""
+import os
+import json
+import gzip
+import time
+import logging
+import argparse
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select, delete, func
+
+from database import DATABASE_URL, sync_url
+from models import AmazonProduct, PriceObservation
+from metrics import RETENTION_ROWS, RETENTION_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+# table=max age pairs (s/m/h/d suffixes); tables left out are kept forever
+RETENTION_POLICIES = os.getenv("RETENTION_POLICIES", "amazon_products=24h")
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "3600"))  # seconds between passes (0 = off)
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+RETENTION_PAUSE = float(os.getenv("RETENTION_PAUSE", "0.05"))        # between batches, lets writers in
+RETENTION_ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR", "")       # empty = delete without archiving
+
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@dataclass
+class RetentionPolicy:
+    """Rows of `table` whose `column` is older than `max_age` are expired."""
+    table: object        # sqlalchemy Table
+    column: object       # indexed timestamp column
+    max_age: timedelta
+
+    @property
+    def name(self):
+        return self.table.name
+
+
+# Tables that can have a policy, with the indexed timestamp that ages them
+RETAINABLE = {
+    "amazon_products": AmazonProduct.__table__.c.created_at,
+    "price_observations": PriceObservation.__table__.c.scraped_at,
+}
+
+
+def parse_age(text):
+    """'90d' -> timedelta(days=90); a bare number is seconds."""
+    text = text.strip().lower()
+    unit = UNITS.get(text[-1:])
+    return timedelta(seconds=float(text[:-1]) * unit if unit else float(text))
+
+
+def parse_policies(spec=RETENTION_POLICIES):
+    """'amazon_products=24h,price_observations=180d' -> [RetentionPolicy, ...]"""
+    policies = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        table, _, age = part.partition("=")
+        table = table.strip()
+        if table not in RETAINABLE or not age:
+            raise ValueError(f"Bad retention policy '{part}'; tables: {sorted(RETAINABLE)}")
+        column = RETAINABLE[table]
+        policies.append(RetentionPolicy(column.table, column, parse_age(age)))
+    return policies
+
+
+class RetentionEngine:
+    """Runs the policies: run_once() for one pass, start()/stop() for the periodic thread."""
+
+    def __init__(self, engine=None, policies=None, batch_size=RETENTION_BATCH_SIZE,
+                 archive_dir=RETENTION_ARCHIVE_DIR, pause=RETENTION_PAUSE):
+        if engine is None:
+            url = sync_url(DATABASE_URL)
+            engine = create_engine(url, pool_pre_ping=True,
+                                   connect_args={"sslmode": "require"} if url.startswith("postgresql") else {})
+        self.engine = engine
+        self.policies = parse_policies() if policies is None else policies
+        self.batch_size = batch_size
+        self.archive_dir = archive_dir
+        self.pause = pause
+        self.last_report = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- one table ----
+    def _expired_batch(self, conn, policy, cutoff):
+        table = policy.table
+        stmt = (
+            # Whole rows only when they are archived
+            select(table if self.archive_dir else table.c.id)
+            .where(policy.column < cutoff)
+            .order_by(policy.column)
+            .limit(self.batch_size)
+        )
+        if self.engine.dialect.name == "postgresql":
+            # Another replica running the same pass skips these rows instead of archiving them twice
+            stmt = stmt.with_for_update(skip_locked=True)
+        return conn.execute(stmt).mappings().all()
+
+    def _archive(self, policy, rows, started):
+        directory = os.path.join(self.archive_dir, policy.name)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{policy.name}-{started:%Y%m%dT%H%M%S}.jsonl.gz")
+        # One gzip member per batch; gzip readers treat the concatenation as one stream
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(dict(row), default=str) + "\n")
+        return path
+
+    def apply(self, policy, now=None, dry_run=False):
+        """Delete (and archive) everything `policy` has expired; returns the table's report."""
+        started = datetime.utcnow()
+        cutoff = (now or started) - policy.max_age
+        key = policy.table.c.id
+        clock = time.perf_counter()
+        report = {"table": policy.name, "cutoff": cutoff.isoformat(), "deleted": 0, "batches": 0, "archive": None}
+
+        if dry_run:
+            with self.engine.connect() as conn:
+                report["expired"] = conn.execute(
+                    select(func.count()).select_from(policy.table).where(policy.column < cutoff)
+                ).scalar()
+        while not dry_run and not self._stop.is_set():
+            with self.engine.begin() as conn:
+                rows = self._expired_batch(conn, policy, cutoff)
+                if not rows:
+                    break
+                if self.archive_dir:
+                    # Written before the DELETE commits: a crash can only duplicate, never lose rows
+                    report["archive"] = self._archive(policy, rows, started)
+                deleted = conn.execute(delete(policy.table).where(key.in_([r["id"] for r in rows]))).rowcount
+            report["deleted"] += deleted
+            report["batches"] += 1
+            RETENTION_ROWS.labels(policy.name).inc(deleted)
+            if len(rows) < self.batch_size:
+                break
+            time.sleep(self.pause)
+
+        report["seconds"] = round(time.perf_counter() - clock, 3)
+        RETENTION_SECONDS.labels(policy.name).observe(report["seconds"])
+        if report["deleted"]:
+            logger.info(f"[RETENTION] {policy.name}: deleted {report['deleted']} rows older than "
+                        f"{cutoff:%Y-%m-%d %H:%M} in {report['batches']} batches ({report['seconds']}s)")
+        return report
+
+    def run_once(self, dry_run=False):
+        """One pass over every policy; a failing table is reported and the rest still run."""
+        started = datetime.utcnow()
+        tables = []
+        for policy in self.policies:
+            try:
+                tables.append(self.apply(policy, now=started, dry_run=dry_run))
+            except Exception as e:
+                logger.error(f"[RETENTION] {policy.name} failed: {e}")
+                tables.append({"table": policy.name, "error": str(e)})
+        self.last_report = {"started_at": started.isoformat(), "dry_run": dry_run, "tables": tables}
+        return self.last_report
+
+    # ---- schedule ----
+    def _loop(self, interval):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(interval)
+
+    def start(self, interval=RETENTION_INTERVAL):
+        """Run a pass now and then every `interval` seconds on a daemon thread."""
+        if interval <= 0 or not self.policies or self._thread:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,), name="retention", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop the schedule; a running pass ends after its current batch."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Delete rows past their retention period")
+    parser.add_argument("--dry-run", action="store_true", help="only count expired rows")
+    args = parser.parse_args()
+    print(json.dumps(RetentionEngine().run_once(dry_run=args.dry_run), indent=2))
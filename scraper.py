@@ -1,46 +1,57 @@
 import os
 import csv
-import time, re
-import random
 import logging
-import asyncio
+import atexit
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
-from sqlalchemy import text
 
 # ----------------------
 # DB Integration
 # ----------------------
 from database import AsyncSessionLocal
 from models import AmazonProduct
+from extractors import parse_search_page, parse_product_page
+from driver_pool import DriverPool
+from driver_profiles import DRIVER_PROFILE, apply_profile, enable_request_blocking
+from fetchers import build_fetcher, SCRAPER_FETCHER, AMAZON_BASE_URL
+from db_writer import get_writer
+from membership import split_known_async
+from observations import new_run_id
+from snapshots import archive_page
+from circuit_breaker import breaker, RobotCheckError, CircuitOpenError
+from metrics import timed, traced, install_trace_filter, PAGES, ITEMS, ROBOT_CHECKS, DB_ERRORS
 
 # ----------------------
 # Config
 # ----------------------
 HEADLESS = True
 WAIT_TIME = 10
-ASIN_RE = re.compile(r"([A-Z0-9]{10})")
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))
+DRIVER_MAX_PAGES = int(os.getenv("DRIVER_MAX_PAGES", "50"))
+# Tabs pipelined per browser (Selenium fetcher); 1 = one page at a time
+DRIVER_TABS = int(os.getenv("DRIVER_TABS", "1"))
 
 # ----------------------
 # Logging (Production)
 # ----------------------
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
+    format="%(asctime)s [%(levelname)s] [%(trace_id)s] %(message)s",
     handlers=[logging.FileHandler("scraper.log"), logging.StreamHandler()],
 )
+install_trace_filter()
 logger = logging.getLogger(__name__)
 
 # ----------------------
 # Setup Chrome Driver
 # ----------------------
-def start_driver(headless=True):
+def start_driver(headless=True, profile=DRIVER_PROFILE):
     chrome_options = Options()
     if headless:
         chrome_options.add_argument("--headless=new")
@@ -54,49 +65,94 @@ def start_driver(headless=True):
     chrome_options.add_argument("--lang=en-US")
     chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                                 "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36")
+    apply_profile(chrome_options, profile)
 
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    with timed("driver_start"):
+        service = Service(ChromeDriverManager().install())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+    enable_request_blocking(driver, profile)
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     return driver
 
+
+# Shared pool: scrapers borrow a warm browser instead of cold-starting Chrome per call
+driver_pool = DriverPool(
+    lambda: start_driver(headless=HEADLESS),
+    size=DRIVER_POOL_SIZE,
+    max_pages=DRIVER_MAX_PAGES,
+)
+atexit.register(driver_pool.close)
+
+# Page fetcher, chosen by SCRAPER_FETCHER (selenium | http | auto)
+fetcher = build_fetcher(SCRAPER_FETCHER, driver_pool, WAIT_TIME)
+atexit.register(fetcher.close)
+
 # ----------------------
 # Save to Database
 # ----------------------
-async def save_to_db(asin, title, price, currency, status, product_url):
-    """Async helper to save scraped item to database (production safe)."""
+async def save_many_to_db(items):
+    """
+    Async helper to save scraped items to the database (production safe).
+    ASINs already stored are resolved in one set-based pass and skipped,
+    instead of a SELECT per row. Returns how many rows were added.
+    """
     async with AsyncSessionLocal() as session:
         try:
-            result = await session.execute(
-                text("SELECT asin FROM amazon_products WHERE asin = :asin"),
-                {"asin": asin},
-            )
-            if result.first():
+            by_asin = {item["asin"]: item for item in items if item.get("asin")}
+            new, existing = await split_known_async(session, list(by_asin))
+            for asin in existing:
                 logger.info(f" Skipping duplicate ASIN: {asin}")
-                return
-
-            product = AmazonProduct(
-                asin=asin,
-                title=title,
-                price=price,
-                currency=currency,
-                status=status,
-                product_url=product_url,
-            )
-            session.add(product)
+            if not new:
+                return 0
+
+            session.add_all([
+                AmazonProduct(
+                    asin=asin,
+                    title=by_asin[asin]["title"],
+                    price=by_asin[asin]["price"],
+                    currency=by_asin[asin]["currency"],
+                    status=by_asin[asin]["status"],
+                    product_url=by_asin[asin]["product_url"],
+                )
+                for asin in new
+            ])
             await session.commit()
-            logger.info(f"[OK] Saved to DB: {asin} | {title[:60]} | {price} {currency} | {status}")
+            for asin in new:
+                item = by_asin[asin]
+                logger.info(f"[OK] Saved to DB: {asin} | {item['title'][:60]} | {item['price']} {item['currency']} | {item['status']}")
+            return len(new)
 
         except Exception as e:
             await session.rollback()
+            DB_ERRORS.labels("save_to_db").inc()
             logger.error(f"[DB ERROR] {e}")
+            return 0
 
-def save_price(asin, title, price, currency, status, url):
-    """Sync wrapper for DB save."""
+
+async def save_to_db(asin, title, price, currency, status, product_url):
+    """Save one scraped item; see save_many_to_db."""
+    return await save_many_to_db([{
+        "asin": asin,
+        "title": title,
+        "price": price,
+        "currency": currency,
+        "status": status,
+        "product_url": product_url,
+    }])
+
+def save_price(asin, title, price, currency, status, url, run_id=None):
+    """Queue an item on the shared batch writer (bulk upsert, flushed by size/time)."""
     try:
-        asyncio.run(save_to_db(asin, title, price, currency, status, url))
+        get_writer().add({
+            "asin": asin,
+            "title": title,
+            "price": price,
+            "currency": currency,
+            "status": status,
+            "product_url": url,
+        }, run_id=run_id)
     except Exception as e:
-        logger.error(f"[ASYNC ERROR] {e}")
+        logger.error(f"[DB WRITER ERROR] {e}")
 
 # ----------------------
 # CSV Helper
@@ -118,202 +174,351 @@ def save_to_csv(data, keyword):
     return filename
 
 # ----------------------
-# Main Scraper
+# Guarded fetch (circuit breaker)
 # ----------------------
-def scrape_from_search_pages(keyword, pages=1):
-    print(f" Starting scrape for '{keyword}' ({pages} pages)")
+class ScrapeResults(list):
+    """
+    Items scraped so far. When a block stopped the run early, `pending_pages`
+    lists the pages still to do and `retry_after` says when to try them.
+    """
 
-    driver = start_driver(headless=HEADLESS)
-    all_results = []
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.pending_pages = []
+        self.retry_after = 0.0
 
+
+def fetch_page(url, kind):
+    """
+    Fetch one page through the shared circuit breaker.
+    Raises RobotCheckError on a block page (which trips the breaker) and
+    CircuitOpenError while the host is cooling down for longer than BREAKER_MAX_WAIT.
+    """
+    breaker.before_request(url)
     try:
-        base = f"https://www.amazon.com/s?k={keyword.replace(' ', '+')}"
+        result = fetcher.fetch(url, kind=kind)
+    except Exception:
+        breaker.release(url)
+        raise
+    return _settle(url, kind, result)
 
-        for page in range(1, pages + 1):
-            url = f"{base}&page={page}"
-            print(f"[PAGE {page}] {url}")
 
-            try:
-                driver.get(url)
-            except Exception as e:
-                print(f"[ERROR] Page load failed: {e}")
-                continue
+def _settle(url, kind, result):
+    """Count the page and report it to the breaker; raises RobotCheckError on a block page."""
+    PAGES.labels(kind, result.source).inc()
 
-            page_src = driver.page_source
-            if "Robot Check" in page_src or "Enter the characters" in page_src:
-                print("[/] Amazon robot check / anti-bot page detected. Aborting this run.")
-                return []
+    if result.robot_check:
+        ROBOT_CHECKS.labels(kind).inc()
+        breaker.record_block(url)
+        raise RobotCheckError(url)
+    breaker.record_success(url)
+    return result
 
-            try:
-                WebDriverWait(driver, WAIT_TIME).until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.s-main-slot [data-asin]"))
-                )
-            except Exception:
-                print(f"[WARN] Timeout waiting for results on page {page}")
-                continue
 
-            time.sleep(random.uniform(2.0, 4.0))
-            items = driver.find_elements(By.CSS_SELECTOR, "div.s-main-slot div[data-asin][data-component-type='s-search-result']")
-            if not items:
-                items = driver.find_elements(By.XPATH, "//div[@data-asin and contains(@class,'s-result-item')]")
+def tabs_enabled():
+    return DRIVER_TABS > 1 and hasattr(fetcher, "tab_session")
 
-            print(f"→ Found {len(items)} items on page {page}")
 
-            for item in items:
-                time.sleep(random.uniform(0.8, 2.2))
+def fetch_pages(todo, kind, url_for, may_start=None, tabs=DRIVER_TABS):
+    """
+    Fetch the page of every key in `todo` (search pages or ASINs, popped as
+    tabs free up) through `tabs` tabs of one browser, round-robin. Yields
+    (key, FetchResult or exception) in load order. A tab only gets its next
+    URL after the caller has handled its page, so parsing overlaps the
+    other tabs' loads. Breaker bookkeeping matches fetch_page; callers may
+    push keys back onto `todo`, and `may_start(key)` returning False stops
+    new navigations.
+    """
+    with fetcher.tab_session(tabs) as session:
+        idle, loading = list(session.handles), deque()
+        stopped = False
+        while (todo and not stopped) or loading:
+            while todo and idle and not stopped:
+                key = todo.popleft()
+                if may_start and not may_start(key):
+                    todo.appendleft(key)
+                    stopped = True
+                    break
+                url = url_for(key)
                 try:
-                    asin = (item.get_attribute("data-asin") or "").strip()
-                    if not asin or not ASIN_RE.fullmatch(asin):
-                        continue
-
-                    try:
-                        anchor = item.find_element(By.CSS_SELECTOR, "h2 a")
-                        href = anchor.get_attribute("href") or ""
-                        product_url = href.split("?")[0]
-                    except:
-                        product_url = f"https://www.amazon.com/dp/{asin}"
-
-                    title = "Unknown"
-                    for sel in [
-                        "h2 a span",
-                        "span.a-size-base-plus.a-color-base.a-text-normal",
-                        "span.a-size-medium.a-color-base.a-text-normal",
-                    ]:
-                        try:
-                            txt = item.find_element(By.CSS_SELECTOR, sel).text.strip()
-                            if txt:
-                                title = txt
-                                break
-                        except:
-                            continue
-
-                    price = None
-                    for sel in [
-                        "span.a-price span.a-offscreen",
-                        "span.a-price-whole",
-                        "span.a-text-price span.a-offscreen",
-                    ]:
-                        try:
-                            el = item.find_element(By.CSS_SELECTOR, sel)
-                            raw = el.text.strip().replace("$", "").replace(",", "")
-                            if raw:
-                                price = float(re.sub(r"[^\d.]", "", raw))
-                                break
-                        except:
-                            continue
-
-                    status = "ok" if price else "no_price"
-                    currency = "USD"
-
-                    save_price(asin, title, price or "", currency, status, product_url)
-
-                    all_results.append({
-                        "asin": asin,
-                        "title": title,
-                        "price": price or "",
-                        "currency": currency,
-                        "status": status,
-                        "product_url": product_url,
-                    })
-
+                    # With pages in flight never sleep here: their outcome is what reopens the circuit
+                    breaker.before_request(url, max_wait=0 if loading else None)
+                except CircuitOpenError as e:
+                    if loading:
+                        todo.appendleft(key)
+                        break
+                    yield key, e
+                    continue
+                tab = idle.pop()
+                try:
+                    session.start(tab, url)
                 except Exception as e:
-                    print(f"[ERROR] Skipping item: {e}")
+                    breaker.release(url)
+                    idle.append(tab)
+                    yield key, e
                     continue
+                loading.append((tab, key, url))
+            if not loading:
+                continue
 
-            time.sleep(random.uniform(2.5, 5.0))
+            tab, key, url = loading.popleft()
+            try:
+                result = session.collect(tab, url, kind)
+            except Exception as e:
+                breaker.release(url)
+                result = e
+            else:
+                try:
+                    result = _settle(url, kind, result)
+                except RobotCheckError as e:
+                    result = e
+            idle.append(tab)
+            yield key, result
 
-        print(f" Scraper finished. Total results: {len(all_results)}")
-        if all_results:
-            save_to_csv(all_results, keyword)
 
-        return all_results
+class PendingKeys:
+    """deque-like view of an iterator for fetch_pages: keys are pulled only when a tab is free."""
 
-    finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
-        print(" Driver closed.")
+    def __init__(self, source):
+        self._head = deque()
+        self._source = iter(source)
+
+    def __bool__(self):
+        if not self._head:
+            try:
+                self._head.append(next(self._source))
+            except StopIteration:
+                return False
+        return True
+
+    def popleft(self):
+        if not self:
+            raise IndexError("pop from empty PendingKeys")
+        return self._head.popleft()
+
+    def appendleft(self, key):
+        self._head.appendleft(key)
+
+
+# ----------------------
+# Main Scraper
+# ----------------------
+def _scrape_search_page(keyword, page, url):
+    """
+    Fetch and parse one search results page: (items, last page number shown).
+    Items is None when the page failed to load; block errors propagate.
+    """
+    try:
+        result = fetch_page(url, "search")
+    except (RobotCheckError, CircuitOpenError):
+        raise
+    except Exception as e:
+        logger.error(f"[ERROR] Page load failed: {e}")
+        return None, None
+    return _parse_search_result(keyword, page, url, result)
+
+
+def _parse_search_result(keyword, page, url, result):
+    archive_page(result.html, url, "search", keyword=keyword, page=page)
+
+    # One HTML document per page; every card is parsed in-process.
+    with timed("extract"):
+        items, last_page = parse_search_page(result.html)
+    ITEMS.labels("search").inc(len(items))
+    if not items:
+        logger.warning(f"[WARN] No results found on page {page}")
+    else:
+        logger.info(f"→ Found {len(items)} items on page {page}")
+    return items, last_page
+
+
+def _search_pages_pooled(keyword, todo, workers, url_for, may_start):
+    """Yield (page, (items, last_page) or block error), `workers` pages at once on pooled browsers."""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search-page") as pool:
+        running = {}
+        while todo or running:
+            while todo and len(running) < workers:
+                page = todo.popleft()
+                if not may_start(page):
+                    todo.appendleft(page)
+                    break
+                future = pool.submit(contextvars.copy_context().run, _scrape_search_page, keyword, page, url_for(page))
+                running[future] = page
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=running.get):
+                page = running.pop(future)
+                try:
+                    outcome = future.result()
+                except (RobotCheckError, CircuitOpenError) as e:
+                    outcome = e
+                yield page, outcome
+
+
+def _search_pages_tabs(keyword, todo, tabs, url_for, may_start):
+    """Same as _search_pages_pooled, with the pages loading in `tabs` tabs of one browser."""
+    for page, result in fetch_pages(todo, "search", url_for, may_start, tabs=tabs):
+        if isinstance(result, (RobotCheckError, CircuitOpenError)):
+            yield page, result
+        elif isinstance(result, Exception):
+            logger.error(f"[ERROR] Page load failed: {result}")
+            yield page, (None, None)
+        else:
+            yield page, _parse_search_result(keyword, page, result.url, result)
+
+
+@traced
+def scrape_from_search_pages(keyword, pages=1, persist=True, progress=None, page_numbers=None, workers=1):
+    """
+    Scrape `pages` search result pages for `keyword` (or exactly `page_numbers`).
+    With persist=True the items are queued on the DB batch writer at the end;
+    callers that write the rows themselves (e.g. /run-scraper) pass persist=False.
+    `progress(pages_done=..., items_found=...)` is called after every page.
+
+    With workers > 1 that many pages are fetched at once, each worker on its
+    own pooled browser - or, with DRIVER_TABS > 1, in that many tabs of a
+    single browser (at most DRIVER_TABS); the shared rate scheduler still
+    paces navigations.
+    No page past an empty one or past the last number in the pagination bar
+    is fetched. Results are merged in page order, first occurrence of an ASIN wins.
+
+    A robot check trips the shared circuit breaker and the page is retried once
+    the cooldown passes. If the cooldown is longer than BREAKER_MAX_WAIT the run
+    stops; the items collected so far are kept and the unfinished pages are
+    returned in `.pending_pages` for the caller to requeue.
+    """
+    all_results = ScrapeResults()
+    run_id = new_run_id()
+    todo = deque(sorted(set(page_numbers)) if page_numbers else range(1, pages + 1))
+    workers = max(1, min(int(workers), len(todo) or 1))
+    tabs = workers > 1 and tabs_enabled()
+    if tabs:
+        workers = min(workers, DRIVER_TABS)
+    logger.info(f"Starting scrape for '{keyword}' ({len(todo)} pages, {workers} {'tabs' if tabs else 'workers'}) "
+                f"via {fetcher.name} fetcher, run {run_id}")
+    base = f"{AMAZON_BASE_URL}/s?k={keyword.replace(' ', '+')}"
+
+    by_page, found = {}, set()
+    stop_at = None      # no page after this one has results
+    blocked, blocked_pages = None, []
+
+    def page_url(page):
+        url = f"{base}&page={page}"
+        logger.info(f"[PAGE {page}] {url}")
+        return url
+
+    def may_start(page):
+        return blocked is None and (stop_at is None or page <= stop_at)
+
+    run_pages = _search_pages_tabs if tabs else _search_pages_pooled
+    for page, outcome in run_pages(keyword, todo, workers, page_url, may_start):
+        if isinstance(outcome, RobotCheckError):
+            logger.warning(f"[/] Robot check on page {page}; retrying after the breaker cooldown.")
+            todo.appendleft(page)
+            continue
+        if isinstance(outcome, CircuitOpenError):
+            blocked = outcome if blocked is None or outcome.retry_after > blocked.retry_after else blocked
+            blocked_pages.append(page)
+            continue
+
+        items, last_page = outcome
+        if items is not None and not items:
+            stop_at = page if stop_at is None else min(stop_at, page)
+        if last_page:
+            stop_at = last_page if stop_at is None else min(stop_at, last_page)
+        by_page[page] = items or []
+        found.update(item["asin"] for item in by_page[page])
+        if progress:
+            progress(pages_done=len(by_page), items_found=len(found))
+
+    if stop_at is not None and any(p > stop_at for p in todo):
+        logger.info(f"Stopped after page {stop_at}: no results beyond it")
+
+    # Merge in page order; pages past the end that were already in flight are dropped
+    seen = set()
+    for page in sorted(by_page):
+        if stop_at is not None and page > stop_at:
+            continue
+        for item in by_page[page]:
+            if item["asin"] not in seen:
+                seen.add(item["asin"])
+                all_results.append(item)
+
+    if blocked is not None:
+        all_results.pending_pages = sorted(
+            blocked_pages + [p for p in todo if stop_at is None or p <= stop_at]
+        )
+        all_results.retry_after = blocked.retry_after
+        logger.warning(f"[/] {blocked}. Stopping with {len(all_results)} items; pages {all_results.pending_pages} left.")
+
+    logger.info(f"Scraper finished. Total results: {len(all_results)}")
+    if all_results:
+        if persist:
+            for item in all_results:
+                save_price(item["asin"], item["title"], item["price"], item["currency"],
+                           item["status"], item["product_url"], run_id=run_id)
+            get_writer().flush()
+        save_to_csv(all_results, keyword)
+
+    return all_results
 
 
+@traced
 def scrape_product_by_asin(asin: str):
     """
     Scrape a single Amazon product directly from its ASIN page.
-    Returns structured product data.
+    Returns structured product data, or None when the page has no product.
+    Raises RobotCheckError / CircuitOpenError when blocked, so callers can requeue the ASIN.
     """
-    driver = start_driver(headless=HEADLESS)
-    product_url = f"https://www.amazon.com/dp/{asin}"
+    product_url = f"{AMAZON_BASE_URL}/dp/{asin}"
 
     try:
-        print(f"[🔍] Scraping ASIN: {asin}")
-        driver.get(product_url)
-        print(f"[INFO] Opening URL: {product_url}")
-        WebDriverWait(driver, WAIT_TIME).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "body"))
-        )
-        time.sleep(random.uniform(2.0, 3.5))
-
-        page_src = driver.page_source
-        if "Robot Check" in page_src or "Enter the characters" in page_src:
-            print(f"[⚠️] Robot check detected for ASIN: {asin}")
-            return None
-
-        # ✅ Title
-        title = None
-        for sel in [
-            "#productTitle",
-            "span#title",
-            "h1 span.a-size-large",
-        ]:
-            try:
-                el = driver.find_element(By.CSS_SELECTOR, sel)
-                title = el.text.strip()
-                if title:
-                    break
-            except:
-                continue
-        if not title:
-            print(f"[❌] Title not found for ASIN: {asin}")
-            return None
-
-        # ✅ Price
-        price = None
-        for sel in [
-            "span.a-price span.a-offscreen",
-            "#corePriceDisplay_desktop_feature_div span.a-offscreen",
-            "span#price_inside_buybox",
-            "span#priceblock_ourprice",
-            "span#priceblock_dealprice",
-        ]:
-            try:
-                el = driver.find_element(By.CSS_SELECTOR, sel)
-                raw = el.text.strip()
-                if raw:
-                    price = float(re.sub(r"[^\d.]", "", raw))
-                    break
-            except:
-                continue
+        logger.info(f"[🔍] Scraping ASIN: {asin} ({product_url})")
+        result = fetch_page(product_url, "product")
+        return _parse_product_result(asin, product_url, result)
 
-        status = "ok" if price else "no_price"
-        currency = "USD"
+    except (RobotCheckError, CircuitOpenError) as e:
+        logger.warning(f"[⚠️] {asin} blocked: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"[❌] Failed to scrape ASIN {asin}: {e}")
+        return None
 
-        print(f"[✅] Scraped {asin} | {title[:50]} | {price if price else 'N/A'}")
 
-        return {
-            "asin": asin,
-            "title": title,
-            "price": price or "",
-            "currency": currency,
-            "status": status,
-            "product_url": product_url,
-        }
+def _parse_product_result(asin, url, result):
+    archive_page(result.html, url, "product", asin=asin)
 
-    except Exception as e:
-        print(f"[❌] Failed to scrape ASIN {asin}: {e}")
+    with timed("extract"):
+        item = parse_product_page(result.html, asin)
+    if not item:
+        logger.warning(f"[❌] Title not found for ASIN: {asin}")
         return None
 
-    finally:
+    ITEMS.labels("product").inc()
+    logger.info(f"[✅] Scraped {asin} | {item['title'][:50]} | {item['price'] or 'N/A'}")
+    return item
+
+
+def scrape_products(asins, tabs=DRIVER_TABS):
+    """
+    Scrape a stream of ASINs through `tabs` tabs of one browser (see
+    fetch_pages): the next product pages load while the current one is
+    parsed. Yields (asin, item, error) like asin_executor.scrape_asins;
+    block errors come back as `error`, other failures as item None.
+    ASINs are pulled from `asins` only as tabs free up.
+    """
+    for asin, result in fetch_pages(PendingKeys(asins), "product", lambda a: f"{AMAZON_BASE_URL}/dp/{a}", tabs=tabs):
+        if isinstance(result, (RobotCheckError, CircuitOpenError)):
+            logger.warning(f"[⚠️] {asin} blocked: {result}")
+            yield asin, None, result
+            continue
+        item = None
         try:
-            driver.quit()
-        except:
-            pass
+            if isinstance(result, Exception):
+                raise result
+            item = _parse_product_result(asin, result.url, result)
+        except Exception as e:
+            logger.error(f"[❌] Failed to scrape ASIN {asin}: {e}")
+        yield asin, item, None
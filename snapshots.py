@@ -0,0 +1,230 @@
+"""
+Content-addressed, zstd-compressed archive of every fetched page, plus an
+offline replay mode that re-runs the current extractors over it.
+
+    python snapshots.py stats
+    python snapshots.py replay --kind search --keyword "wireless earbuds" --processes 4 [--write]
+
+Layout:
+    <SNAPSHOT_DIR>/objects/ab/abcdef...zst   page HTML, keyed by sha256 of the content
+    <SNAPSHOT_DIR>/index.sqlite3             one row per fetch (url, kind, asin, keyword, page, time)
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import zstandard
+
+from extractors import parse_search_results, parse_product_page
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"))
+# Opt-in: the archive is for replay and benchmarking and is never pruned
+SNAPSHOTS_ENABLED = os.getenv("SNAPSHOTS_ENABLED", "0") == "1"
+SNAPSHOT_ZSTD_LEVEL = int(os.getenv("SNAPSHOT_ZSTD_LEVEL", "10"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    asin TEXT,
+    keyword TEXT,
+    page INTEGER,
+    fetched_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_snapshots_asin ON snapshots (asin, fetched_at);
+CREATE INDEX IF NOT EXISTS ix_snapshots_keyword_page ON snapshots (keyword, page, fetched_at);
+CREATE INDEX IF NOT EXISTS ix_snapshots_fetched_at ON snapshots (fetched_at);
+"""
+
+
+class SnapshotStore:
+    def __init__(self, root=SNAPSHOT_DIR, level=SNAPSHOT_ZSTD_LEVEL):
+        self.root = root
+        self.level = level
+        self.objects = os.path.join(root, "objects")
+        os.makedirs(self.objects, exist_ok=True)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    # zstd contexts are not thread-safe; keep one per thread
+    def _compressor(self):
+        if not hasattr(self._local, "cctx"):
+            self._local.cctx = zstandard.ZstdCompressor(level=self.level)
+        return self._local.cctx
+
+    def _decompressor(self):
+        if not hasattr(self._local, "dctx"):
+            self._local.dctx = zstandard.ZstdDecompressor()
+        return self._local.dctx
+
+    def _path(self, sha):
+        return os.path.join(self.objects, sha[:2], f"{sha}.zst")
+
+    def store(self, html, url, kind, asin=None, keyword=None, page=None, fetched_at=None):
+        """Archive one fetched page; identical content is stored once. Returns the sha256."""
+        raw = html.encode("utf-8")
+        sha = hashlib.sha256(raw).hexdigest()
+        path = self._path(sha)
+
+        if os.path.exists(path):
+            stored_size = os.path.getsize(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            blob = self._compressor().compress(raw)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, path)
+            stored_size = len(blob)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO snapshots (sha256, url, kind, asin, keyword, page, fetched_at, size, stored_size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sha, url, kind, asin, keyword, page, fetched_at or time.time(), len(raw), stored_size),
+            )
+            self._db.commit()
+        return sha
+
+    def load(self, sha):
+        with open(self._path(sha), "rb") as f:
+            return self._decompressor().decompress(f.read()).decode("utf-8")
+
+    def query(self, kind=None, asin=None, keyword=None, page=None, since=None, until=None):
+        """Index rows (dicts) matching every given filter, oldest first."""
+        clauses, params = [], []
+        for column, value in (("kind", kind), ("asin", asin), ("keyword", keyword), ("page", page)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("fetched_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("fetched_at < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            cur = self._db.execute(f"SELECT * FROM snapshots {where} ORDER BY fetched_at, id", params)
+            columns = [c[0] for c in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def stats(self):
+        with self._lock:
+            count, objects, size, stored = self._db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT sha256), COALESCE(SUM(size), 0), "
+                "COALESCE(SUM(stored_size), 0) FROM snapshots"
+            ).fetchone()
+        return {"snapshots": count, "objects": objects, "raw_bytes": size, "stored_bytes": stored}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore()
+        return _store
+
+
+def archive_page(html, url, kind, asin=None, keyword=None, page=None):
+    """Best-effort hook for the scrapers; archiving never breaks a scrape."""
+    if not SNAPSHOTS_ENABLED or not html:
+        return None
+    try:
+        return get_store().store(html, url, kind, asin=asin, keyword=keyword, page=page)
+    except Exception as e:
+        logger.warning(f"[SNAPSHOT] Could not archive {url}: {e}")
+        return None
+
+
+# ----------------------
+# Offline replay
+# ----------------------
+def _replay_chunk(root, rows):
+    """Worker process: decompress and re-extract a chunk of snapshots."""
+    store = SnapshotStore(root)
+    items = []
+    for row in rows:
+        html = store.load(row["sha256"])
+        scraped_at = datetime.utcfromtimestamp(row["fetched_at"])
+        if row["kind"] == "search":
+            parsed = parse_search_results(html)
+        else:
+            item = parse_product_page(html, row["asin"])
+            parsed = [item] if item else []
+        items.extend(dict(item, scraped_at=scraped_at) for item in parsed)
+    return len(rows), items
+
+
+def replay(rows, processes=None, chunk_size=50, root=SNAPSHOT_DIR):
+    """Re-run the extractors over archived snapshots in parallel; returns items in fetch order."""
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    items = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for _, chunk_items in pool.map(_replay_chunk, [root] * len(chunks), chunks):
+            items.extend(chunk_items)
+    return items
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Page snapshot archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="archive size and compression ratio")
+
+    rp = sub.add_parser("replay", help="re-parse archived pages without touching the network")
+    rp.add_argument("--kind", choices=["search", "product"])
+    rp.add_argument("--asin")
+    rp.add_argument("--keyword")
+    rp.add_argument("--page", type=int)
+    rp.add_argument("--since", help="ISO date/time")
+    rp.add_argument("--until", help="ISO date/time")
+    rp.add_argument("--processes", type=int, default=os.cpu_count())
+    rp.add_argument("--write", action="store_true", help="upsert the rebuilt rows into the database")
+    args = parser.parse_args()
+
+    store = get_store()
+    if args.command == "stats":
+        stats = store.stats()
+        ratio = stats["raw_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0
+        print(f"{stats['snapshots']} snapshots, {stats['objects']} objects, "
+              f"{stats['raw_bytes']:,} -> {stats['stored_bytes']:,} bytes ({ratio:.1f}x)")
+    else:
+        rows = store.query(args.kind, args.asin, args.keyword, args.page,
+                           _parse_time(args.since), _parse_time(args.until))
+        t0 = time.perf_counter()
+        items = replay(rows, processes=args.processes)
+        elapsed = time.perf_counter() - t0
+        print(f"Replayed {len(rows)} snapshots -> {len(items)} items in {elapsed:.2f}s")
+
+        if args.write and items:
+            from db_writer import get_writer
+            run_id = f"replay:{int(time.time())}"
+            added, _ = get_writer().write_many(items, run_id=run_id, on_conflict="update")
+            print(f"Wrote {added} rows (run_id={run_id})")
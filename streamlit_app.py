@@ -1,7 +1,23 @@
 import streamlit as st
 import pandas as pd
 import os
-from scraper import PRODUCTS_FILE, PRICES_FILE, start_driver, scrape_from_csv, scrape_from_search
+from contextlib import contextmanager
+from scraper import PRODUCTS_FILE, PRICES_FILE, start_driver, driver_pool, scrape_from_csv, scrape_from_search
+
+
+@contextmanager
+def browser(headless):
+    """Headless runs reuse the shared pool; a visible browser is started on demand."""
+    if headless:
+        with driver_pool.borrow() as driver:
+            yield driver
+        return
+    driver = start_driver(headless=False)
+    try:
+        yield driver
+    finally:
+        driver.quit()
+
 
 st.set_page_config(layout="wide", page_title="Amazon Price Tracker")
 
@@ -23,18 +39,16 @@ if mode == "CSV Mode":
         st.warning("No products.csv found.")
 
     if st.button("Run CSV Scraper"):
-        driver = start_driver(headless=headless)
-        scrape_from_csv(driver, max_items=max_items if max_items > 0 else None)
-        driver.quit()
+        with browser(headless) as driver:
+            scrape_from_csv(driver, max_items=max_items if max_items > 0 else None)
         st.success("CSV scraping completed!")
 
 # Search Mode
 if mode == "Search Mode":
     keyword = st.text_input("Enter keyword or ASIN (e.g., wired mouse, B07PGL2ZSL)")
     if st.button("Run Search Scraper"):
-        driver = start_driver(headless=headless)
-        scrape_from_search(driver, keyword)
-        driver.quit()
+        with browser(headless) as driver:
+            scrape_from_search(driver, keyword)
         st.success(f"Scraping for '{keyword}' completed!")
 
 # Show results
@@ -0,0 +1,34 @@
+import os
+import sys
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import PriceObservation  # noqa: E402
+from observations import to_observation  # noqa: E402
+from price_query import fetch_prices  # noqa: E402
+
+
+def test_cursor_walks_every_row_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'prices.db'}")
+    PriceObservation.__table__.create(engine)
+    with Session(engine) as session:
+        # Written in one burst, so most rows share a wall-clock second
+        rows = [to_observation({"asin": f"B0TEST{i % 7:04d}", "price": 10 + i}) for i in range(50)]
+        session.execute(PriceObservation.__table__.insert(), rows)
+        session.commit()
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = fetch_prices(session, ["id", "scraped_at"], limit=7, cursor=cursor)
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            pages += 1
+            assert pages <= 50, "cursor never reached the last page"
+            if not cursor:
+                break
+
+    assert len(seen) == len(set(seen)) == 50
+    assert seen == sorted(seen, reverse=True)
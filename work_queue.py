@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, select, update, func, or_, and_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import DATABASE_URL, sync_url
+from models import WorkItem
+
+logger = logging.getLogger(__name__)
+
+# ----------------------
+# Config
+# ----------------------
+# "1": the API enqueues pages/ASINs for worker nodes (worker.py) instead of scraping in-process
+WORK_QUEUE = os.getenv("WORK_QUEUE", "0") == "1"
+QUEUE_LEASE_SECONDS = float(os.getenv("QUEUE_LEASE_SECONDS", "120"))  # a claim expires unless renewed
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))        # deliveries before an item fails
+QUEUE_RETRY_DELAY = float(os.getenv("QUEUE_RETRY_DELAY", "30"))       # pause before a failed item is redelivered
+QUEUE_POLL_INTERVAL = float(os.getenv("QUEUE_POLL_INTERVAL", "1.0"))
+QUEUE_INSERT_CHUNK = 500
+
+ITEMS = WorkItem.__table__
+OPEN_STATES = ("queued", "leased")
+
+
+def page_payload(keyword, page, max_age=None):
+    """`max_age` travels with the page: the worker skips ASINs scraped more recently than that."""
+    return json.dumps({"keyword": keyword, "page": page, "max_age": max_age}, sort_keys=True)
+
+
+def make_engine(url=None):
+    """
+    Engine for queue operations. On SQLite every transaction starts with
+    BEGIN IMMEDIATE, taking the database write lock up front, so two
+    processes can never claim the same row (SQLite has no SKIP LOCKED).
+    """
+    url = url or sync_url(DATABASE_URL)
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True,
+                             connect_args={"sslmode": "require"} if url.startswith("postgresql") else {})
+
+    engine = create_engine(url, connect_args={"timeout": 30})
+
+    @event.listens_for(engine, "connect")
+    def _no_implicit_begin(dbapi_connection, _record):
+        # Let SQLAlchemy emit BEGIN itself (pysqlite would defer it)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+class WorkQueue:
+    """
+    Work queue in the shared database (table work_items), so any number of
+    worker nodes can pull pages and ASINs from the same job.
+
+    claim()    leases up to N available items to one worker; Postgres uses
+               SELECT ... FOR UPDATE SKIP LOCKED so workers never wait on each
+               other, SQLite serialises claims with BEGIN IMMEDIATE.
+    extend()   renews the leases of items still being worked on.
+    complete() / fail() / release()
+               settle an item; they only apply while the caller still owns
+               the lease, so a worker that lost its lease cannot overwrite
+               the outcome of the worker that took over.
+    A worker that dies simply stops renewing: once its leases expire the
+    items are delivered again, until QUEUE_MAX_ATTEMPTS deliveries.
+    """
+
+    def __init__(self, engine=None, lease_seconds=QUEUE_LEASE_SECONDS, max_attempts=QUEUE_MAX_ATTEMPTS):
+        self.engine = engine or make_engine()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.dialect = self.engine.dialect.name
+
+    # ---- producer side ----
+    def enqueue(self, job_id, kind, payloads):
+        """
+        Add items for `job_id`. Idempotent per (job_id, payload): items already
+        queued, leased or done are left alone, failed ones are queued again.
+        """
+        insert = postgresql.insert if self.dialect == "postgresql" else sqlite.insert
+        now = datetime.utcnow()
+        payloads = list(dict.fromkeys(payloads))
+        with self.engine.begin() as conn:
+            for i in range(0, len(payloads), QUEUE_INSERT_CHUNK):
+                stmt = insert(ITEMS).values([
+                    {"job_id": job_id, "kind": kind, "payload": p, "state": "queued",
+                     "attempts": 0, "available_at": now, "updated_at": now}
+                    for p in payloads[i:i + QUEUE_INSERT_CHUNK]
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[ITEMS.c.job_id, ITEMS.c.payload],
+                    set_={"state": "queued", "attempts": 0, "error": None, "available_at": now, "updated_at": now},
+                    where=ITEMS.c.state == "failed",
+                )
+                conn.execute(stmt)
+        return len(payloads)
+
+    def counts(self, job_id):
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(ITEMS.c.state, func.count()).where(ITEMS.c.job_id == job_id).group_by(ITEMS.c.state)
+            ).all()
+        counts = {"queued": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update({state: n for state, n in rows})
+        return counts
+
+    def outcomes(self, job_id, payloads=None):
+        """{payload: (state, result dict, error)} for the job's items (optionally a subset)."""
+        stmt = select(ITEMS.c.payload, ITEMS.c.state, ITEMS.c.result, ITEMS.c.error).where(ITEMS.c.job_id == job_id)
+        found = {}
+        with self.engine.connect() as conn:
+            if payloads is None:
+                chunks = [None]
+            else:
+                payloads = list(payloads)
+                chunks = [payloads[i:i + QUEUE_INSERT_CHUNK] for i in range(0, len(payloads), QUEUE_INSERT_CHUNK)]
+            for chunk in chunks:
+                part = stmt if chunk is None else stmt.where(ITEMS.c.payload.in_(chunk))
+                for payload, state, result, error in conn.execute(part):
+                    found[payload] = (state, json.loads(result) if result else {}, error)
+        return found
+
+    def wait(self, job_id, payloads=None, progress=None, poll=QUEUE_POLL_INTERVAL):
+        """Block until none of the job's items (or of `payloads`) are queued or leased."""
+        while True:
+            if payloads is None:
+                counts = self.counts(job_id)
+                open_ = counts["queued"] + counts["leased"]
+            else:
+                outcomes = self.outcomes(job_id, payloads)
+                open_ = sum(1 for state, _, _ in outcomes.values() if state in OPEN_STATES)
+            if progress:
+                progress(open_)
+            if not open_:
+                return
+            time.sleep(poll)
+
+    # ---- worker side ----
+    def claim(self, worker_id, limit=1):
+        """Lease up to `limit` available items to `worker_id`; returns [(id, kind, payload)]."""
+        now = datetime.utcnow()
+        with self.engine.begin() as conn:
+            # Expired leases that used up their deliveries fail instead of looping forever
+            conn.execute(
+                update(ITEMS)
+                .where(ITEMS.c.state == "leased", ITEMS.c.lease_expires_at < now,
+                       ITEMS.c.attempts >= self.max_attempts)
+                .values(state="failed", error="lease expired", lease_owner=None, updated_at=now)
+            )
+            stmt = (
+                select(ITEMS.c.id, ITEMS.c.kind, ITEMS.c.payload)
+                .where(or_(
+                    and_(ITEMS.c.state == "queued", ITEMS.c.available_at <= now),
+                    and_(ITEMS.c.state == "leased", ITEMS.c.lease_expires_at < now),
+                ))
+                .order_by(ITEMS.c.id)
+                .limit(limit)
+            )
+            if self.dialect == "postgresql":
+                stmt = stmt.with_for_update(skip_locked=True)
+            rows = conn.execute(stmt).all()
+            if not rows:
+                return []
+            conn.execute(
+                update(ITEMS)
+                .where(ITEMS.c.id.in_([r.id for r in rows]))
+                .values(state="leased", lease_owner=worker_id, attempts=ITEMS.c.attempts + 1,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds), updated_at=now)
+            )
+        return [(r.id, r.kind, r.payload) for r in rows]
+
+    def _settle(self, item_id, worker_id, **values):
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(ITEMS)
+                .where(ITEMS.c.id == item_id, ITEMS.c.state == "leased", ITEMS.c.lease_owner == worker_id)
+                .values(lease_owner=None, lease_expires_at=None, updated_at=datetime.utcnow(), **values)
+            )
+        if not result.rowcount:
+            logger.warning(f"[QUEUE] Lease on item {item_id} was lost by {worker_id}; outcome dropped")
+        return bool(result.rowcount)
+
+    def extend(self, item_ids, worker_id):
+        """Renew the leases `worker_id` holds on `item_ids`."""
+        if not item_ids:
+            return 0
+        now = datetime.utcnow()
+        with self.engine.begin() as conn:
+            return conn.execute(
+                update(ITEMS)
+                .where(ITEMS.c.id.in_(list(item_ids)), ITEMS.c.state == "leased", ITEMS.c.lease_owner == worker_id)
+                .values(lease_expires_at=now + timedelta(seconds=self.lease_seconds), updated_at=now)
+            ).rowcount
+
+    def complete(self, item_id, worker_id, result=None):
+        return self._settle(item_id, worker_id, state="done", error=None,
+                            result=json.dumps(result) if result is not None else None)
+
+    def fail(self, item_id, worker_id, error, retry_delay=QUEUE_RETRY_DELAY):
+        """Queue the item again after `retry_delay`, or fail it once its deliveries are used up."""
+        with self.engine.connect() as conn:
+            attempts = conn.execute(select(ITEMS.c.attempts).where(ITEMS.c.id == item_id)).scalar() or 0
+        if attempts >= self.max_attempts:
+            return self._settle(item_id, worker_id, state="failed", error=str(error)[:255])
+        return self._settle(item_id, worker_id, state="queued", error=str(error)[:255],
+                            available_at=datetime.utcnow() + timedelta(seconds=retry_delay))
+
+    def release(self, item_id, worker_id, delay=0.0):
+        """Hand the item back without charging a delivery (e.g. the host's circuit is open)."""
+        return self._settle(item_id, worker_id, state="queued", attempts=ITEMS.c.attempts - 1,
+                            available_at=datetime.utcnow() + timedelta(seconds=delay))
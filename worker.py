@@ -0,0 +1,164 @@
+"""
+Worker node for the shared work queue (work_queue.py).
+
+    python worker.py [--concurrency 2] [--drain]
+
+Claims search pages and ASINs leased from the work_items table, scrapes
+them with this node's own browser pool and writes the rows through the
+batch writer. Run as many nodes as the target site's rate budget allows
+(Procfile: `worker`); with WORK_QUEUE=1 the API only enqueues work.
+Leases are renewed while an item is in progress, so a node that crashes
+just lets its leases lapse and the items go to another node.
+"""
+import os
+import json
+import signal
+import socket
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from scraper import scrape_from_search_pages, scrape_product_by_asin, driver_pool
+from db_writer import get_writer
+from observations import new_run_id
+from database import DATABASE_URL, sync_url
+from result_cache import ResultCache
+from circuit_breaker import breaker, RobotCheckError, CircuitOpenError
+from fetchers import AMAZON_BASE_URL
+from metrics import trace
+from work_queue import WorkQueue, QUEUE_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Claims up to `concurrency` items at a time and settles each one when it finishes."""
+
+    def __init__(self, queue=None, concurrency=None, worker_id=None):
+        self.queue = queue or WorkQueue()
+        self.concurrency = max(1, concurrency or driver_pool.size)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.stats = {"done": 0, "failed": 0, "released": 0}
+        self._held = set()
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(self.concurrency)
+        url = sync_url(DATABASE_URL)
+        engine = create_engine(url, pool_pre_ping=True,
+                               connect_args={"sslmode": "require"} if url.startswith("postgresql") else {})
+        # Same freshness rules as the API's search_job (max_age, else CACHE_TTL_SECONDS)
+        self.cache = ResultCache(sessionmaker(bind=engine))
+        self._stop = threading.Event()
+
+    # ---- one item ----
+    def handle(self, kind, payload):
+        """Scrape and store one item; returns its result. Blocks raise RobotCheckError/CircuitOpenError."""
+        if kind == "asin":
+            item = scrape_product_by_asin(payload)
+            if not item:
+                raise RuntimeError("no data")
+            added, _ = get_writer().write_many([item], run_id=new_run_id(), on_conflict="update")
+            return {"items": 1, "added": added}
+
+        if kind == "page":
+            spec = json.loads(payload)
+            results = scrape_from_search_pages(spec["keyword"], persist=False, page_numbers=[spec["page"]])
+            if results.pending_pages:
+                raise CircuitOpenError(AMAZON_BASE_URL, results.retry_after)
+            _, stale = self.cache.partition([r["asin"] for r in results], spec.get("max_age"))
+            stale = set(stale)
+            to_write = [r for r in results if r["asin"] in stale]
+            added, _ = get_writer().write_many(to_write, run_id=new_run_id(), on_conflict="update")
+            for item in to_write:
+                self.cache.put(item)
+            return {"items": len(results), "added": added, "skipped": len(results) - len(to_write),
+                    "asins": [r["asin"] for r in results]}
+
+        raise ValueError(f"Unknown work item kind '{kind}'")
+
+    def process(self, item_id, kind, payload):
+        outcome = "failed"
+        try:
+            with trace():
+                result = self.handle(kind, payload)
+        except (RobotCheckError, CircuitOpenError):
+            # Not the item's fault: hand it back for when the circuit closes again
+            self.queue.release(item_id, self.worker_id, delay=max(1.0, breaker.retry_after(AMAZON_BASE_URL)))
+            outcome = "released"
+        except Exception as e:
+            logger.error(f"[WORKER] {kind} {payload} failed: {e}")
+            self.queue.fail(item_id, self.worker_id, e)
+            outcome = "failed"
+        else:
+            self.queue.complete(item_id, self.worker_id, result)
+            outcome = "done"
+        finally:
+            with self._lock:
+                self._held.discard(item_id)
+                self.stats[outcome] += 1
+            self._slots.release()
+
+    # ---- loop ----
+    def _heartbeat(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            with self._lock:
+                held = list(self._held)
+            try:
+                self.queue.extend(held, self.worker_id)
+            except Exception as e:
+                logger.error(f"[WORKER] Lease renewal failed: {e}")
+
+    def run(self, drain=False):
+        """Work until stop() (or, with `drain`, until nothing is left to claim)."""
+        threading.Thread(target=self._heartbeat, name="lease-heartbeat", daemon=True).start()
+        logger.info(f"[WORKER] {self.worker_id} started ({self.concurrency} slots)")
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="queue-worker") as pool:
+            while not self._stop.is_set():
+                self._slots.acquire()
+                if self._stop.is_set():
+                    self._slots.release()
+                    break
+                free = 1
+                while free < self.concurrency and self._slots.acquire(blocking=False):
+                    free += 1
+                try:
+                    claimed = self.queue.claim(self.worker_id, free)
+                except Exception as e:
+                    logger.error(f"[WORKER] Claim failed: {e}")
+                    claimed = []
+                for _ in range(free - len(claimed)):
+                    self._slots.release()
+                if not claimed:
+                    with self._lock:
+                        idle = not self._held
+                    if drain and idle:
+                        break
+                    self._stop.wait(QUEUE_POLL_INTERVAL)
+                    continue
+                with self._lock:
+                    self._held.update(item_id for item_id, _, _ in claimed)
+                for item_id, kind, payload in claimed:
+                    pool.submit(self.process, item_id, kind, payload)
+        self._stop.set()
+        logger.info(f"[WORKER] {self.worker_id} stopped {self.stats}")
+        return self.stats
+
+    def stop(self, *_):
+        self._stop.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape items from the shared work queue")
+    parser.add_argument("--concurrency", type=int, default=None, help="items at once (default: DRIVER_POOL_SIZE)")
+    parser.add_argument("--drain", action="store_true", help="exit once the queue is empty")
+    args = parser.parse_args()
+
+    worker = Worker(concurrency=args.concurrency)
+    # Finish the items in hand on shutdown; unclaimed work stays in the queue
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run(drain=args.drain)
+    get_writer().flush()